@@ -0,0 +1,79 @@
+"""Benchmark of the streaming export writers.
+
+Writes generated site and workbook rows in every format and reports rows
+per second and file size. Parquet and Arrow are skipped without pyarrow.
+
+    python -m benchmarks.export_writers --rows 100000 --batch_size 10000
+
+"""
+import argparse
+import importlib.util
+import os
+import tempfile
+import time
+
+from inventory_export import DEFAULT_BATCH_SIZE, WORKBOOK_COLUMNS, open_export, workbook_rows
+from query_sites import SITE_COLUMNS, Site
+
+
+def site_records(count: int):
+    for index in range(count):
+        yield Site(f'Site {index}', f'{index:08d}-0000-0000-0000-000000000000',
+                   f'site{index}', 'Active')
+
+
+def workbook_nodes(count: int, sheets: int = 8, dashboards: int = 2):
+    # Each node flattens to 1 + sheets + dashboards rows.
+    for index in range(count // (1 + sheets + dashboards)):
+        yield {
+            'name': f'Workbook {index}',
+            'id': f'{index:08d}-2222-2222-2222-222222222222',
+            'sheets': [{'name': f'Sheet {sheet}'} for sheet in range(sheets)],
+            'dashboards': [{'name': f'Dashboard {sheet}'} for sheet in range(dashboards)],
+            'sheetsConnection': {'totalCount': sheets},
+            'dashboardsConnection': {'totalCount': dashboards},
+        }
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmark the export writers")
+    parser.add_argument('--rows', type=int, default=100000, help='rows written per run')
+    parser.add_argument('--batch_size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='rows written at a time')
+
+    args = parser.parse_args()
+
+    formats = ['csv', 'ndjson']
+
+    if importlib.util.find_spec('pyarrow') is not None:
+        formats += ['parquet', 'arrow']
+    else:
+        print('pyarrow is not installed, skipping parquet and arrow')
+
+    inventories = [
+        ('sites', SITE_COLUMNS, lambda: site_records(args.rows)),
+        ('workbooks', WORKBOOK_COLUMNS, lambda: workbook_rows(workbook_nodes(args.rows))),
+    ]
+
+    print(f"{'inventory':<10} {'format':<8} {'rows':>8} {'seconds':>8} "
+          f"{'rows/s':>10} {'MB':>7}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for inventory, columns, rows in inventories:
+            for export_format in formats:
+                path = os.path.join(directory, f'{inventory}.{export_format}')
+                start = time.perf_counter()
+
+                with open_export(path, columns, export_format, args.batch_size) as writer:
+                    writer.write(rows())
+
+                elapsed = time.perf_counter() - start
+
+                print(f'{inventory:<10} {export_format:<8} {writer.rows:>8} '
+                      f'{elapsed:>8.3f} {writer.rows / elapsed:>10.0f} '
+                      f'{os.path.getsize(path) / 2 ** 20:>7.2f}')
+
+
+if __name__ == '__main__':
+    main()
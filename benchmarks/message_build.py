@@ -0,0 +1,109 @@
+"""Benchmark of per-message email build time.
+
+Compares building and serializing a MIMEMultipart per recipient with
+rendering a pre-encoded MessageTemplate, at growing body sizes. Before
+timing, each template's output is parsed back to check it only uses CRLF
+line endings and decodes to the personalized subject and body.
+
+    python -m benchmarks.message_build --messages 2000 --scales 1 4 16
+
+"""
+import argparse
+import email
+import html
+import re
+import time
+
+from email.header import decode_header, make_header
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from sample_email import HTML_BODY, SUBJECT, MessageTemplate
+
+PERSONALIZED_BODY = HTML_BODY.replace(
+    'Python sent this email!',
+    'Hi ${name}, Python sent this email! <a href="${link}">View your report</a>')
+PERSONALIZED_SUBJECT = 'Hello ${name}, report ${report}'
+BARE_LF = re.compile(rb'(?<!\r)\n')
+
+
+def build_mime(body: str, sender: str, recipient: dict) -> bytes:
+    msg = MIMEMultipart('related')
+    msg['Subject'] = SUBJECT
+    msg['From'] = sender
+    msg['To'] = recipient['email']
+
+    personalized = body.replace('${name}', html.escape(recipient['name'])).replace(
+        '${link}', html.escape(recipient['link']))
+    msg.attach(MIMEText(personalized, 'html', 'utf-8'))
+
+    return msg.as_bytes()
+
+
+def check_round_trip(body: str):
+    """Check a rendered template parses back to the personalized message.
+
+    Uses a long non-ASCII name, so the Subject is folded into several
+    encoded words, and a numeric field as read from JSONL.
+
+    Args:
+        body (str): Template body containing ${name} and ${link}.
+
+    """
+    recipient = {'email': 'user@example.com', 'name': 'Zoë Ångström-Müller ' * 6,
+                 'link': 'https://reports.example.com/?a=1&b=2', 'report': 42}
+    message_bytes = MessageTemplate(body, PERSONALIZED_SUBJECT).render(
+        'sender@example.com', recipient)
+
+    assert not BARE_LF.search(message_bytes), 'bare LF in rendered message'
+
+    message = email.message_from_bytes(message_bytes)
+    subject = str(make_header(decode_header(message['Subject'])))
+    expected_subject = f"Hello {recipient['name']}, report 42"
+    decoded_body = message.get_payload()[0].get_payload(decode=True).decode('utf-8')
+    expected_body = body.replace('${name}', html.escape(recipient['name'])).replace(
+        '${link}', html.escape(recipient['link']))
+
+    assert subject == expected_subject, f'subject {subject!r} != {expected_subject!r}'
+    assert decoded_body.replace('\r\n', '\n') == expected_body, 'body mismatch'
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmark email build time")
+    parser.add_argument('--messages', type=int, default=2000, help='messages built per run')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 4, 16],
+                        help='copies of HTML_BODY in the body; only the first is personalized')
+
+    args = parser.parse_args()
+
+    recipients = [{'email': f'user{index}@example.com', 'name': f'User {index}',
+                   'link': f'https://reports.example.com/{index}'}
+                  for index in range(args.messages)]
+
+    print(f"{'body KiB':>9} {'builder':<14} {'us/message':>11}")
+
+    for scale in args.scales:
+        body = PERSONALIZED_BODY + HTML_BODY * (scale - 1)
+        template = MessageTemplate(body)
+        check_round_trip(body)
+        builders = {
+            'MIMEMultipart': lambda sender, recipient: build_mime(body, sender,
+                                                                  recipient),
+            'MessageTemplate': template.render,
+        }
+
+        for name, build in builders.items():
+            start = time.perf_counter()
+
+            for recipient in recipients:
+                build('sender@example.com', recipient)
+
+            elapsed = time.perf_counter() - start
+
+            print(f'{len(body) / 1024:>9.0f} {name:<14} '
+                  f'{elapsed / args.messages * 1e6:>11.1f}')
+
+
+if __name__ == '__main__':
+    main()
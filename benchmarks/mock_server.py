@@ -0,0 +1,355 @@
+"""Local mock of the Tableau Server REST and Metadata APIs for offline benchmarks.
+
+    python -m benchmarks.mock_server --sites 5000 --workbooks 20000 --latency 0.05
+
+"""
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from query_sites import MAX_PAGE_SIZE, NAMESPACE
+
+AUTH_TOKEN = 'mock-auth-token'
+
+
+class MockTableauHandler(BaseHTTPRequestHandler):
+    """Serve tsResponse XML for sign in, sign out and Query Sites, and
+    workbooksConnection pages for Metadata API queries."""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes on a keep-alive connection, which
+    # otherwise stall ~40 ms per response on Nagle and delayed ACKs.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.server.record(url.path)
+
+        if not self.server.is_signed_in(self.headers.get('X-Tableau-Auth')):
+            self.send_error_xml(401, '401002', 'Unauthorized Access',
+                                'Invalid authentication credentials were provided')
+            return
+
+        if random.random() < self.server.error_rate:
+            self.send_error_xml(503, '503000', 'Service Unavailable',
+                                'Injected mock server error')
+            return
+
+        if url.path.endswith('/sites/') or url.path.endswith('/sites'):
+            query = parse_qs(url.query)
+            page_size = int(query.get('pageSize', ['100'])[0])
+            page_number = int(query.get('pageNumber', ['1'])[0])
+
+            if page_size > MAX_PAGE_SIZE:
+                self.send_error_xml(400, '400006', 'Bad Request',
+                                    f'Page size {page_size} is too large')
+                return
+
+            self.send_xml(200, self.server.sites_page(page_size, page_number),
+                          latency=self.server.latency
+                          + self.server.latency_per_site * page_size)
+            return
+
+        if url.path.endswith('/projects'):
+            query = parse_qs(url.query)
+            page_size = int(query.get('pageSize', ['100'])[0])
+            page_number = int(query.get('pageNumber', ['1'])[0])
+            self.send_xml(200, self.server.projects_page(page_size, page_number))
+            return
+
+        if '/sites/' in url.path:
+            site_id = url.path.rsplit('/', 1)[-1]
+
+            try:
+                index = int(site_id.split('-')[0])
+            except ValueError:
+                self.send_error_xml(404, '404000', 'Site Not Found', site_id)
+                return
+
+            self.send_xml(200, (
+                f'<tsResponse xmlns="{NAMESPACE["t"]}">'
+                f'<site id="{site_id}" name="Site {index}" contentUrl="site{index}" '
+                'adminMode="ContentAndUsers" state="Active">'
+                f'<usage numUsers="{index % 50}" numCreators="{index % 5}" '
+                f'numExplorers="{index % 10}" numViewers="{index % 35}" '
+                f'storage="{index * 1024}"/></site></tsResponse>'))
+            return
+
+        self.send_error_xml(404, '404000', 'Resource Not Found', self.path)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.server.record(url.path)
+
+        if url.path.endswith('/metadata/graphql'):
+            if not self.server.is_signed_in(self.headers.get('X-Tableau-Auth')):
+                self.send_error_xml(401, '401002', 'Unauthorized Access',
+                                    'Invalid authentication credentials were provided')
+                return
+
+            request = json.loads(body)
+            variables = request.get('variables') or {}
+            first = variables.get('first') or 100
+
+            if 'filter0' in variables:
+                data = {f'shard{index}': self.server.workbooks_page(
+                            first, variables[f'after{index}'],
+                            variables[f'filter{index}'], request['query'])
+                        for index in itertools.takewhile(
+                            lambda index: f'filter{index}' in variables,
+                            itertools.count())}
+            else:
+                data = {'workbooksConnection': self.server.workbooks_page(
+                    first, variables.get('afterToken'), variables.get('filter'),
+                    request['query'])}
+
+            self.send_json(200, {'data': data})
+
+        elif url.path.endswith('/auth/signin'):
+            self.send_xml(200, (
+                f'<tsResponse xmlns="{NAMESPACE["t"]}">'
+                f'<credentials token="{self.server.issue_token()}">'
+                '<site id="mock-site" contentUrl=""/><user id="mock-user"/>'
+                '</credentials></tsResponse>'))
+
+        elif url.path.endswith('/auth/signout'):
+            self.server.revoke_token(self.headers.get('X-Tableau-Auth'))
+            self.send_xml(204, '')
+
+        else:
+            self.send_error_xml(404, '404000', 'Resource Not Found', self.path)
+
+    def send_xml(self, status: int, body: str, latency: float = None):
+        time.sleep(self.server.latency if latency is None else latency)
+        content = body.encode()
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/xml')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def send_json(self, status: int, body: dict):
+        time.sleep(self.server.latency)
+        content = json.dumps(body).encode()
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def send_error_xml(self, status: int, code: str, summary: str, detail: str):
+        self.send_xml(status, (
+            f'<tsResponse xmlns="{NAMESPACE["t"]}"><error code="{code}">'
+            f'<summary>{summary}</summary><detail>{detail}</detail>'
+            '</error></tsResponse>'))
+
+
+class MockTableauServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the mock site inventory and request counts.
+
+    Signing in issues a new token, signing out revokes it and GET requests
+    with an unknown token are answered with a 401. AUTH_TOKEN is always valid.
+
+    Args:
+        site_count (int): Number of sites on the mock server.
+        latency (float): Seconds slept before every response.
+        latency_per_site (float): Extra seconds slept per site requested.
+        error_rate (float): Fraction of authenticated GET requests answered
+            with a 503.
+        workbook_count (int): Number of workbooks in the Metadata API, spread
+            over project_count projects.
+        sheets_per_workbook (int): Sheets and dashboards in each workbook.
+        project_count (int): Number of projects.
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self, site_count: int = 1000, latency: float = 0.0,
+                 latency_per_site: float = 0.0, error_rate: float = 0.0,
+                 workbook_count: int = 1000, sheets_per_workbook: int = 10,
+                 project_count: int = 10,
+                 address: tuple = ('127.0.0.1', 0)):
+        super().__init__(address, MockTableauHandler)
+        self.site_count = site_count
+        self.latency = latency
+        self.latency_per_site = latency_per_site
+        self.error_rate = error_rate
+        self.workbook_count = workbook_count
+        self.sheets_per_workbook = sheets_per_workbook
+        self.project_count = project_count
+        self.request_counts = {}
+        self.tokens = {AUTH_TOKEN}
+        self._token_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def api_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/api/3.9'
+
+    def record(self, path: str):
+        with self._lock:
+            self.request_counts[path] = self.request_counts.get(path, 0) + 1
+
+    def issue_token(self) -> str:
+        with self._lock:
+            token = f'mock-token-{next(self._token_ids)}'
+            self.tokens.add(token)
+
+        return token
+
+    def revoke_token(self, token: str):
+        with self._lock:
+            if token != AUTH_TOKEN:
+                self.tokens.discard(token)
+
+    def expire_tokens(self):
+        """Invalidate every issued token, as a server restart would."""
+        with self._lock:
+            self.tokens = {AUTH_TOKEN}
+
+    def is_signed_in(self, token: str) -> bool:
+        return token in self.tokens
+
+    def sites_page(self, page_size: int, page_number: int) -> str:
+        start = (page_number - 1) * page_size
+        stop = min(start + page_size, self.site_count)
+
+        sites = ''.join(
+            f'<site id="{index:08d}-0000-0000-0000-000000000000" '
+            f'name="Site {index}" contentUrl="site{index}" '
+            f'adminMode="ContentAndUsers" state="Active"/>'
+            for index in range(start, stop))
+
+        return (
+            f'<tsResponse xmlns="{NAMESPACE["t"]}">'
+            f'<pagination pageNumber="{page_number}" pageSize="{page_size}" '
+            f'totalAvailable="{self.site_count}"/>'
+            f'<sites>{sites}</sites></tsResponse>'
+        )
+
+    def projects_page(self, page_size: int, page_number: int) -> str:
+        start = (page_number - 1) * page_size
+        stop = min(start + page_size, self.project_count)
+
+        projects = ''.join(
+            f'<project id="{index:08d}-3333-3333-3333-333333333333" '
+            f'name="Project {index}" contentPermissions="ManagedByOwner"/>'
+            for index in range(start, stop))
+
+        return (
+            f'<tsResponse xmlns="{NAMESPACE["t"]}">'
+            f'<pagination pageNumber="{page_number}" pageSize="{page_size}" '
+            f'totalAvailable="{self.project_count}"/>'
+            f'<projects>{projects}</projects></tsResponse>'
+        )
+
+    def workbooks_page(self, first: int, after: str, workbook_filter: dict,
+                       query: str = 'sheets { dashboards {') -> dict:
+        """Build one workbooksConnection page.
+
+        Sheets, dashboards and their connection totalCounts are only included
+        when the query selects them, so payload sizes follow the query.
+
+        """
+        indexes = range(self.workbook_count)
+
+        if workbook_filter and 'projectName' in workbook_filter:
+            project = int(workbook_filter['projectName'].rsplit(' ', 1)[-1])
+            indexes = range(project, self.workbook_count, self.project_count)
+
+        start = int(after) if after else 0
+        stop = min(start + first, len(indexes))
+        dashboard_count = self.sheets_per_workbook // 4
+        nodes = []
+
+        for index in indexes[start:stop]:
+            node = {'name': f'Workbook {index}',
+                    'id': f'{index:08d}-2222-2222-2222-222222222222',
+                    'projectName': f'Project {index % self.project_count}'}
+
+            if 'sheets {' in query:
+                node['sheets'] = [{'name': f'Sheet {sheet}'}
+                                  for sheet in range(self.sheets_per_workbook)]
+            if 'dashboards {' in query:
+                node['dashboards'] = [{'name': f'Dashboard {sheet}'}
+                                      for sheet in range(dashboard_count)]
+            if 'sheetsConnection' in query:
+                node['sheetsConnection'] = {'totalCount': self.sheets_per_workbook}
+            if 'dashboardsConnection' in query:
+                node['dashboardsConnection'] = {'totalCount': dashboard_count}
+
+            nodes.append(node)
+
+        return {
+            'nodes': nodes,
+            'totalCount': len(indexes),
+            'pageInfo': {'hasNextPage': stop < len(indexes),
+                         'endCursor': str(stop)},
+        }
+
+
+@contextmanager
+def serve(**kwargs):
+    """Run a MockTableauServer on a background thread.
+
+    Args:
+        **kwargs: Passed through to MockTableauServer.
+
+    Yields:
+        MockTableauServer: The running server.
+
+    """
+    server = MockTableauServer(**kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Mock Tableau Server REST API")
+    parser.add_argument('--port', type=int, default=8000, help='port to listen on')
+    parser.add_argument('--sites', type=int, default=1000, help='number of sites')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds slept before every response')
+    parser.add_argument('--error_rate', type=float, default=0.0,
+                        help='fraction of GET requests answered with a 503')
+    parser.add_argument('--workbooks', type=int, default=1000,
+                        help='number of Metadata API workbooks')
+    parser.add_argument('--latency_per_site', type=float, default=0.0,
+                        help='extra seconds slept per site requested')
+    parser.add_argument('--sheets', type=int, default=10,
+                        help='number of sheets and dashboards in each workbook')
+    parser.add_argument('--projects', type=int, default=10, help='number of projects')
+
+    args = parser.parse_args()
+
+    server = MockTableauServer(args.sites, args.latency, args.latency_per_site,
+                               args.error_rate, args.workbooks, args.sheets,
+                               args.projects, address=('127.0.0.1', args.port))
+    print(f'Serving {server.api_url}')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
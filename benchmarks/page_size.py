@@ -0,0 +1,59 @@
+"""Benchmark of Query Sites page sizes against the local mock server.
+
+Reports request counts and wall time for fixed page sizes and for the
+adaptive mode.
+
+    python -m benchmarks.page_size --sites 5000 --latency 0.05
+
+"""
+import argparse
+import time
+
+from benchmarks.mock_server import AUTH_TOKEN, serve
+from query_sites import TableauRestClient, iter_sites, iter_sites_adaptive
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmark Query Sites page sizes")
+    parser.add_argument('--sites', type=int, default=5000, help='number of mock sites')
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='seconds of mock latency per response')
+    parser.add_argument('--latency_per_site', type=float, default=0.0,
+                        help='extra seconds of mock latency per site requested')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 250, 500, 1000],
+                        help='fixed page sizes to compare')
+
+    args = parser.parse_args()
+
+    print(f"{'mode':<16} {'requests':>9} {'seconds':>9} {'sites':>7}")
+
+    runs = [(f'page_size={size}', size) for size in args.sizes] + [('adaptive', None)]
+
+    for name, size in runs:
+        with serve(site_count=args.sites, latency=args.latency,
+                   latency_per_site=args.latency_per_site) as server:
+            with TableauRestClient(server.api_url, False) as client:
+                page_stats = {}
+                start = time.perf_counter()
+
+                if size is None:
+                    sites = iter_sites_adaptive(client.server_url, AUTH_TOKEN, False,
+                                                client.session, page_stats=page_stats)
+                else:
+                    sites = iter_sites(client.server_url, AUTH_TOKEN, False,
+                                       session=client.session, page_size=size)
+
+                count = sum(1 for _ in sites)
+                elapsed = time.perf_counter() - start
+
+            requests_made = sum(server.request_counts.values())
+
+        if size is None:
+            name = f"adaptive->{page_stats['page_size']}"
+
+        print(f'{name:<16} {requests_made:>9} {elapsed:>9.2f} {count:>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Micro-benchmark of Query Sites response parsing.
+
+Compares the original double ET.fromstring parse, a single parse and the
+incremental iter_parse_sites parser against synthetic site-list payloads.
+The iterparse list run keeps every site like the fromstring parsers do; the
+iterparse stream run turns each site into a Site record and drops it, as
+iter_sites does for a consumer that does not keep the sites.
+
+    python -m benchmarks.site_parsing --sizes 100 1000 10000
+
+"""
+import argparse
+import time
+import tracemalloc
+
+from xml.etree import ElementTree as ET
+
+from query_sites import NAMESPACE, Site, iter_parse_sites
+
+
+def build_sites_xml(site_count: int) -> bytes:
+    """Build a synthetic Query Sites response body.
+
+    Args:
+        site_count (int): Number of t:site elements in the payload.
+
+    Returns:
+        bytes: tsResponse XML document.
+
+    """
+    sites = ''.join(
+        f'<site id="{index:08d}-0000-0000-0000-000000000000" name="Site {index}" '
+        f'contentUrl="site{index}" adminMode="ContentAndUsers" state="Active" '
+        f'revisionHistoryEnabled="true" revisionLimit="25"/>'
+        for index in range(site_count))
+
+    return (
+        f'<tsResponse xmlns="{NAMESPACE["t"]}">'
+        f'<pagination pageNumber="1" pageSize="{site_count}" '
+        f'totalAvailable="{site_count}"/>'
+        f'<sites>{sites}</sites></tsResponse>'
+    ).encode()
+
+
+def parse_double(content: bytes) -> tuple:
+    total_available = ET.fromstring(content).find(
+        './/t:pagination', namespaces=NAMESPACE).attrib['totalAvailable']
+    site_elements = ET.fromstring(content).findall(
+        './/t:site', namespaces=NAMESPACE)
+
+    return int(total_available), [dict(site.attrib) for site in site_elements]
+
+
+def parse_single(content: bytes) -> tuple:
+    response_element = ET.fromstring(content)
+    total_available = response_element.find(
+        './/t:pagination', namespaces=NAMESPACE).attrib['totalAvailable']
+    site_elements = response_element.findall('.//t:site', namespaces=NAMESPACE)
+
+    return int(total_available), [dict(site.attrib) for site in site_elements]
+
+
+def parse_incremental(content: bytes) -> tuple:
+    pagination = {}
+    site_records = list(iter_parse_sites(content, pagination))
+
+    return int(pagination['totalAvailable']), site_records
+
+
+def parse_streaming(content: bytes) -> tuple:
+    pagination = {}
+    site_count = sum(1 for _ in map(Site.from_attrib,
+                                    iter_parse_sites(content, pagination)))
+
+    return int(pagination['totalAvailable']), site_count
+
+
+PARSERS = {
+    'double fromstring': parse_double,
+    'single fromstring': parse_single,
+    'iterparse list': parse_incremental,
+    'iterparse stream': parse_streaming,
+}
+
+
+def measure(parser: object, content: bytes, repeat: int) -> tuple:
+    """Time a parser and record its peak traced memory.
+
+    Returns:
+        tuple: Best wall time in seconds, peak memory in bytes
+
+    """
+    best = float('inf')
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser(content)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    parser(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best, peak
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmark Query Sites parsing")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='number of sites per synthetic page')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per parser')
+
+    args = parser.parse_args()
+
+    print(f"{'sites':>8} {'parser':<18} {'best ms':>10} {'peak KiB':>10}")
+
+    for size in args.sizes:
+        content = build_sites_xml(size)
+
+        for name, parse in PARSERS.items():
+            best, peak = measure(parse, content, args.repeat)
+            print(f'{size:>8} {name:<18} {best * 1000:>10.2f} {peak / 1024:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark of per-site memory and construction time.
+
+Compares the original per-site dict, the Site record and the columnar
+layout built from the same parsed t:site attributes.
+
+    python -m benchmarks.site_records --sites 100000
+
+"""
+import argparse
+import time
+import tracemalloc
+
+from query_sites import Site, sites_to_columns
+
+
+def build_site_attribs(site_count: int) -> list:
+    """Build the attribute dicts iter_parse_sites would yield.
+
+    Args:
+        site_count (int): Number of sites.
+
+    Returns:
+        list: Attributes of each synthetic t:site element.
+
+    """
+    return [{'id': f'{index:08d}-0000-0000-0000-000000000000',
+             'name': f'Site {index}',
+             'contentUrl': f'site{index}',
+             'state': ''.join(['Act', 'ive'])}
+            for index in range(site_count)]
+
+
+def build_dicts(site_attribs: list) -> dict:
+    sites = {}
+
+    for site in site_attribs:
+        sites[site['name']] = {}
+        sites[site['name']]['Name'] = site['name']
+        sites[site['name']]['Luid'] = site['id']
+        sites[site['name']]['Url Namespace'] = site['contentUrl']
+        sites[site['name']]['State'] = site['state']
+
+    return sites
+
+
+def build_records(site_attribs: list) -> list:
+    return list(map(Site.from_attrib, site_attribs))
+
+
+def build_columns(site_attribs: list) -> dict:
+    return sites_to_columns(map(Site.from_attrib, site_attribs))
+
+
+BUILDERS = {
+    'dict of dicts': build_dicts,
+    'Site records': build_records,
+    'columns': build_columns,
+}
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmark site record layouts")
+    parser.add_argument('--sites', type=int, default=100000, help='number of sites')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per layout')
+
+    args = parser.parse_args()
+
+    site_attribs = build_site_attribs(args.sites)
+
+    print(f"{'layout':<14} {'best ms':>10} {'bytes/site':>12}")
+
+    for name, build in BUILDERS.items():
+        best = float('inf')
+
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            build(site_attribs)
+            best = min(best, time.perf_counter() - start)
+
+        tracemalloc.start()
+        result = build(site_attribs)
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del result
+
+        print(f'{name:<14} {best * 1000:>10.1f} {current / args.sites:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark of site snapshot load, diff and apply times.
+
+    python -m benchmarks.site_snapshot --sites 10000 50000 --changed 0.01
+
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from query_sites import Site
+from site_snapshot import SiteSnapshot, diff_sites
+
+
+def build_sites(site_count: int, changed: float = 0.0) -> list:
+    """Build a synthetic inventory with a fraction of sites changed.
+
+    One in every 1 / changed sites is renamed, suspended or replaced by a new
+    site, spread evenly over the three kinds of change.
+
+    Args:
+        site_count (int): Number of sites.
+        changed (float): Fraction of sites that differ from the baseline.
+
+    Returns:
+        list: Site records.
+
+    """
+    step = int(1 / changed) if changed else 0
+    sites = []
+
+    for index in range(site_count):
+        site = Site(f'Site {index}', f'{index:08d}-0000-0000-0000-000000000000',
+                    f'site{index}', 'Active')
+
+        if step and index % step == 0:
+            kind = (index // step) % 3
+
+            if kind == 0:
+                site = site._replace(name=f'Renamed Site {index}')
+            elif kind == 1:
+                site = site._replace(state='Suspended')
+            else:
+                site = site._replace(luid=f'{index:08d}-1111-1111-1111-111111111111')
+
+        sites.append(site)
+
+    return sites
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmark site snapshot diffing")
+    parser.add_argument('--sites', type=int, nargs='+', default=[10000, 50000],
+                        help='number of sites in the snapshot')
+    parser.add_argument('--changed', type=float, default=0.01,
+                        help='fraction of sites changed between runs')
+
+    args = parser.parse_args()
+
+    print(f"{'sites':>8} {'changes':>8} {'load ms':>9} {'diff ms':>9} {'apply ms':>9}")
+
+    for site_count in args.sites:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sites.db')
+
+            with SiteSnapshot(path) as snapshot:
+                snapshot.apply(diff_sites({}, build_sites(site_count)))
+
+            current = build_sites(site_count, args.changed)
+
+            with SiteSnapshot(path) as snapshot:
+                start = time.perf_counter()
+                previous = snapshot.load(Site._make)
+                loaded = time.perf_counter()
+                changes = list(diff_sites(previous, current))
+                diffed = time.perf_counter()
+                snapshot.apply(changes)
+                applied = time.perf_counter()
+
+        print(f'{site_count:>8} {len(changes):>8} {(loaded - start) * 1000:>9.1f} '
+              f'{(diffed - loaded) * 1000:>9.1f} {(applied - diffed) * 1000:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
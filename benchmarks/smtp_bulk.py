@@ -0,0 +1,68 @@
+"""Benchmark of bulk email sending against the local SMTP sink.
+
+Compares a new connection per message, as sample_email.main does for a
+single recipient, with send_bulk over one or more reused connections.
+
+    python -m benchmarks.smtp_bulk --messages 500 --latency 0.005
+
+"""
+import argparse
+import smtplib
+import time
+
+from benchmarks.smtp_sink import serve
+from sample_email import MessageTemplate, build_message, send_bulk
+
+SENDER = 'sender@example.com'
+
+
+def send_one_per_connection(port: int, recipients: list):
+    for recipient in recipients:
+        smtp = smtplib.SMTP('127.0.0.1', port)
+
+        try:
+            smtp.sendmail(SENDER, recipient['email'],
+                          build_message(SENDER, recipient['email']).as_string())
+        finally:
+            smtp.quit()
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmark bulk email sending")
+    parser.add_argument('--messages', type=int, default=500, help='messages sent per run')
+    parser.add_argument('--latency', type=float, default=0.005,
+                        help='seconds the sink sleeps per message')
+    parser.add_argument('--connections', type=int, nargs='+', default=[1, 4],
+                        help='connection pool sizes to compare')
+
+    args = parser.parse_args()
+
+    recipients = [{'email': f'user{index}@example.com'} for index in range(args.messages)]
+    runs = [('connection per message', None)] + [
+        (f'send_bulk x{connections}', connections) for connections in args.connections] + [
+        (f'template x{args.connections[-1]}', args.connections[-1])]
+
+    print(f"{'mode':<24} {'seconds':>8} {'msgs/s':>8} {'connections':>12}")
+
+    for name, connections in runs:
+        with serve(args.latency) as controller:
+            start = time.perf_counter()
+
+            if connections is None:
+                send_one_per_connection(controller.port, recipients)
+            elif name.startswith('template'):
+                send_bulk('127.0.0.1', controller.port, None, None, SENDER,
+                          recipients, connections, build=MessageTemplate().render)
+            else:
+                send_bulk('127.0.0.1', controller.port, None, None, SENDER,
+                          recipients, connections)
+
+            elapsed = time.perf_counter() - start
+
+        print(f'{name:<24} {elapsed:>8.2f} {args.messages / elapsed:>8.0f} '
+              f'{controller.handler.connections:>12}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Local SMTP sink for offline email benchmarks.
+
+Accepts and discards every message, optionally sleeping to simulate a slow
+relay. Requires aiosmtpd.
+
+    python -m benchmarks.smtp_sink --port 8025 --latency 0.01
+
+"""
+import argparse
+import asyncio
+import socket
+import threading
+import time
+
+from contextlib import contextmanager
+
+from aiosmtpd.controller import Controller
+
+
+class SinkHandler:
+    """Count received messages, sleeping latency seconds per message.
+
+    Args:
+        latency (float): Seconds slept before each message is accepted.
+        reject_rate (int): Reject every Nth message with a 451, or 0 for none.
+
+    """
+
+    def __init__(self, latency: float = 0.0, reject_rate: int = 0):
+        self.latency = latency
+        self.reject_rate = reject_rate
+        self.messages = 0
+        self.bytes = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        with self._lock:
+            self.connections += 1
+
+        session.host_name = hostname
+
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        with self._lock:
+            self.messages += 1
+            self.bytes += len(envelope.content)
+            rejected = self.reject_rate and self.messages % self.reject_rate == 0
+
+        if rejected:
+            return '451 4.3.0 Injected temporary failure'
+
+        return '250 OK'
+
+    async def handle_HELO(self, server, session, envelope, hostname):
+        with self._lock:
+            self.connections += 1
+
+        session.host_name = hostname
+
+        return f'250 {server.hostname}'
+
+
+@contextmanager
+def serve(latency: float = 0.0, reject_rate: int = 0, port: int = 0):
+    """Run an SMTP sink on a background thread.
+
+    Args:
+        latency (float): Seconds slept before each message is accepted.
+        reject_rate (int): Reject every Nth message with a 451, or 0 for none.
+        port (int): Port to listen on, or 0 for any free port.
+
+    Yields:
+        Controller: The running aiosmtpd controller; its handler counts
+            messages, bytes and connections.
+
+    """
+    controller = Controller(SinkHandler(latency, reject_rate),
+                            hostname='127.0.0.1', port=port or find_free_port())
+    controller.start()
+
+    try:
+        yield controller
+    finally:
+        controller.stop()
+
+
+def find_free_port() -> int:
+    with socket.socket() as free_socket:
+        free_socket.bind(('127.0.0.1', 0))
+        return free_socket.getsockname()[1]
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Local SMTP sink")
+    parser.add_argument('--port', type=int, default=8025, help='port to listen on')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds slept before each message is accepted')
+
+    args = parser.parse_args()
+
+    with serve(args.latency, port=args.port) as controller:
+        print(f'Listening on 127.0.0.1:{args.port}')
+
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print(f'Received {controller.handler.messages} messages')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,372 @@
+"""Offline benchmark suite against the local mock Tableau server and SMTP sink.
+
+Runs each scenario in a fresh process, so its peak RSS is its own, and
+records throughput, per-request latency and peak RSS. With --baseline the
+results are compared against a saved JSON baseline, or saved as one if it
+does not exist yet; the run exits with status 1 when any metric regressed
+by more than --tolerance.
+
+    python -m benchmarks.suite --baseline baseline.json
+    python -m benchmarks.suite --baseline baseline.json --update_baseline
+
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import tableauserverclient as TSC
+
+import query_sites
+
+from benchmarks.mock_server import AUTH_TOKEN
+from benchmarks.mock_server import serve as serve_tableau
+from benchmarks.smtp_sink import serve as serve_smtp
+from query_metadata import aggregate_workbooks, iter_workbook_nodes, signed_in
+from query_sites import TableauRestClient, api_query_sites
+from rest_session import percentile
+from sample_email import MessageTemplate, dispatch
+from subscription_pipeline import run_subscription_pipeline
+
+SENDER = 'sender@example.com'
+DEFAULT_TOLERANCE = 0.15
+# Metrics compared against the baseline and whether higher values are better.
+METRICS = {
+    'items_per_second': True,
+    'p50': False,
+    'p95': False,
+    'peak_rss_bytes': False,
+}
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite")
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS),
+                        choices=list(SCENARIOS), help='scenarios to run')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs of each scenario; the median run is reported')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='multiplier of the number of sites, workbooks and messages')
+    parser.add_argument('--latency', type=float, default=0.002,
+                        help='seconds of mock server latency per response')
+    parser.add_argument('--smtp_latency', type=float, default=0.001,
+                        help='seconds of SMTP sink latency per message')
+    parser.add_argument('--baseline', required=False,
+                        help='path of the JSON baseline to compare against')
+    parser.add_argument('--update_baseline', action='store_true',
+                        help='save the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='relative change of a metric reported as a regression')
+    parser.add_argument('--output', required=False,
+                        help='path the JSON results are written to')
+
+    args = parser.parse_args()
+
+    results = run_suite(args.scenarios, args.repeat, args.scale, args.latency,
+                        args.smtp_latency)
+
+    print(f"{'scenario':<14} {'items':>8} {'items/s':>10} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'peak RSS MB':>12}")
+
+    for name, result in results['scenarios'].items():
+        print(f"{name:<14} {result['items']:>8} {result['items_per_second']:>10.1f} "
+              f"{format_ms(result['p50']):>8} {format_ms(result['p95']):>8} "
+              f"{format_mb(result['peak_rss_bytes']):>12}")
+
+    if args.output:
+        write_json(args.output, results)
+
+    if not args.baseline:
+        return
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        write_json(args.baseline, results)
+        print(f'Saved baseline {args.baseline}')
+        return
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+
+    if baseline.get('config') != results['config']:
+        print(f"Warning: baseline config {baseline.get('config')} differs from "
+              f"{results['config']}", file=sys.stderr)
+
+    changes = compare_results(baseline, results, args.tolerance)
+    regressions = [change for change in changes if change['regressed']]
+
+    print(f"\n{'scenario':<14} {'metric':<18} {'baseline':>12} {'current':>12} {'change':>8}")
+
+    for change in changes:
+        flag = '  REGRESSED' if change['regressed'] else ''
+        print(f"{change['scenario']:<14} {change['metric']:<18} "
+              f"{change['baseline']:>12.4g} {change['current']:>12.4g} "
+              f"{change['change']:>+8.1%}{flag}")
+
+    if regressions:
+        print(f'\n{len(regressions)} metrics regressed by more than '
+              f'{args.tolerance:.0%} against {args.baseline}')
+        sys.exit(1)
+
+
+def run_suite(scenarios, repeat: int = 3, scale: float = 1.0,
+              latency: float = 0.002, smtp_latency: float = 0.001) -> dict:
+    """Run the scenarios against freshly started mock servers.
+
+    The servers run in this process and every run of a scenario in a new
+    child process, so a scenario's peak RSS does not include the servers or
+    the scenarios run before it.
+
+    Args:
+        scenarios (iterable): Names of the scenarios in SCENARIOS to run.
+        repeat (int): Runs of each scenario.
+        scale (float): Multiplier of the number of sites, workbooks and
+            messages.
+        latency (float): Seconds of mock server latency per response.
+        smtp_latency (float): Seconds of SMTP sink latency per message.
+
+    Returns:
+        dict: Environment and per-scenario results.
+
+    """
+    if repeat < 1:
+        raise ValueError(f'Repeat must be at least 1, got {repeat}')
+
+    config = {
+        'sites': int(5000 * scale),
+        'workbooks': int(5000 * scale),
+        'messages': int(1000 * scale),
+        'subscribed_sites': max(int(50 * scale), 1),
+    }
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'config': dict(config, latency=latency, smtp_latency=smtp_latency),
+        'scenarios': {},
+    }
+    context = multiprocessing.get_context('spawn')
+
+    with serve_tableau(site_count=config['sites'], latency=latency,
+                       workbook_count=config['workbooks']) as tableau_server, \
+            serve_smtp(smtp_latency) as smtp_sink:
+
+        config['server_url'] = tableau_server.api_url.rsplit('/api/', 1)[0]
+        config['smtp_port'] = smtp_sink.port
+
+        for name in scenarios:
+            runs = []
+
+            for _ in range(repeat):
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    runs.append(executor.submit(run_scenario, name, config).result())
+
+            results['scenarios'][name] = summarize_runs(runs)
+
+    return results
+
+
+def run_scenario(name: str, config: dict) -> dict:
+    """Run one scenario and measure it; called in a child process.
+
+    Args:
+        name (str): Name of the scenario in SCENARIOS.
+        config (dict): Mock server addresses and scenario sizes.
+
+    Returns:
+        dict: Items processed, seconds, per-request latencies and peak RSS
+            in bytes.
+
+    """
+    latencies = []
+    start = time.perf_counter()
+    items = SCENARIOS[name](config, latencies)
+    seconds = time.perf_counter() - start
+
+    return {
+        'items': items,
+        'seconds': seconds,
+        'latencies': latencies,
+        'peak_rss_bytes': peak_rss_bytes(),
+    }
+
+
+def summarize_runs(runs: list) -> dict:
+    """Reduce the runs of a scenario to the median run's throughput.
+
+    Latency percentiles are taken over the requests of all runs and peak
+    RSS is the highest of any run.
+
+    Args:
+        runs (list): Results of run_scenario.
+
+    Returns:
+        dict: Items, seconds, items per second, p50 and p95 latency in
+            seconds and peak RSS in bytes.
+
+    """
+    seconds = statistics.median(run['seconds'] for run in runs)
+    latencies = sorted(latency for run in runs for latency in run['latencies'])
+    rss = [run['peak_rss_bytes'] for run in runs if run['peak_rss_bytes']]
+
+    return {
+        'items': runs[0]['items'],
+        'runs': len(runs),
+        'seconds': seconds,
+        'items_per_second': runs[0]['items'] / seconds if seconds else None,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'peak_rss_bytes': max(rss) if rss else None,
+    }
+
+
+def compare_results(baseline: dict, results: dict,
+                    tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """Compare the metrics of every scenario found in both results.
+
+    Args:
+        baseline (dict): Results of an earlier run_suite.
+        results (dict): Results of the current run_suite.
+        tolerance (float): Relative change of a metric in the worse
+            direction reported as a regression.
+
+    Returns:
+        list: Scenario, metric, baseline and current values, relative change
+            and whether it regressed, for each compared metric.
+
+    """
+    changes = []
+
+    for name, result in results['scenarios'].items():
+        previous = baseline['scenarios'].get(name)
+
+        if previous is None:
+            continue
+
+        for metric, higher_is_better in METRICS.items():
+            if not previous.get(metric) or result.get(metric) is None:
+                continue
+
+            change = result[metric] / previous[metric] - 1
+            worse = -change if higher_is_better else change
+
+            changes.append({
+                'scenario': name,
+                'metric': metric,
+                'baseline': previous[metric],
+                'current': result[metric],
+                'change': change,
+                'regressed': worse > tolerance,
+            })
+
+    return changes
+
+
+def bench_query_sites(config: dict, latencies: list) -> int:
+    fetch_page = query_sites.api_query_sites_page
+
+    def timed_page(*args, **kwargs) -> tuple:
+        # Pages are parsed lazily, so the timing includes consuming the page
+        # as well as the request and body transfer.
+        start = time.perf_counter()
+        total_available, site_records = fetch_page(*args, **kwargs)
+        site_records = list(site_records)
+        latencies.append(time.perf_counter() - start)
+
+        return total_available, site_records
+
+    query_sites.api_query_sites_page = timed_page
+
+    try:
+        with TableauRestClient(f"{config['server_url']}/api/3.9", False,
+                               pool_size=4) as client:
+            sites = api_query_sites(client.server_url, AUTH_TOKEN, False,
+                                    concurrency=4, session=client.session)
+    finally:
+        query_sites.api_query_sites_page = fetch_page
+
+    return len(sites)
+
+
+def bench_metadata(config: dict, latencies: list) -> int:
+    server = TSC.Server(config['server_url'])
+    server.version = '3.9'
+    tableau_auth = TSC.TableauAuth('user', 'password')
+    query_stats = []
+
+    with signed_in(server, tableau_auth):
+        workbooks = aggregate_workbooks(
+            iter_workbook_nodes(server, tableau_auth, query_stats=query_stats))
+
+    latencies.extend(stats['request_seconds'] for stats in query_stats)
+
+    return len(workbooks)
+
+
+def bench_smtp(config: dict, latencies: list) -> int:
+    recipients = ({'email': f'user{index}@example.com'}
+                  for index in range(config['messages']))
+    stats = asyncio.run(dispatch('127.0.0.1', config['smtp_port'], None, None, SENDER,
+                                 recipients, MessageTemplate().render, concurrency=4))
+
+    latencies.extend(stats.latencies)
+
+    return stats.sent
+
+
+def bench_pipeline(config: dict, latencies: list) -> int:
+    site_count = config['subscribed_sites']
+    recipients = ({'email': f'user{index}@example.com', 'site': f'site{index % site_count}'}
+                  for index in range(config['messages']))
+    summary = run_subscription_pipeline(
+        config['server_url'], '3.9', 'user', 'password', False, recipients,
+        '127.0.0.1', config['smtp_port'], None, None, SENDER)
+
+    return summary['messages']
+
+
+SCENARIOS = {
+    'query_sites': bench_query_sites,
+    'metadata': bench_metadata,
+    'smtp': bench_smtp,
+    'pipeline': bench_pipeline,
+}
+
+
+def peak_rss_bytes() -> int:
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def write_json(path: str, results: dict):
+    with open(path, 'w') as results_file:
+        json.dump(results, results_file, indent=2)
+
+
+def format_ms(seconds: float) -> str:
+    return '-' if seconds is None else f'{seconds * 1000:.1f}'
+
+
+def format_mb(size: int) -> str:
+    return '-' if size is None else f'{size / 2 ** 20:.1f}'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark of Metadata API workbook aggregation.
+
+Compares the original list-membership de-duplication keyed by workbook
+name with aggregate_workbooks on synthetic workbook nodes.
+
+    python -m benchmarks.workbook_aggregation --workbooks 10000 --sheets 200
+
+"""
+import argparse
+import time
+
+from query_metadata import aggregate_workbooks
+
+
+def build_nodes(workbook_count: int, sheet_count: int) -> list:
+    """Build synthetic workbooksConnection nodes.
+
+    Each workbook lists every sheet twice, as the Metadata API does for
+    sheets reached through several paths, and has a quarter as many
+    dashboards as sheets.
+
+    Args:
+        workbook_count (int): Number of workbooks.
+        sheet_count (int): Distinct sheets per workbook.
+
+    Returns:
+        list: Workbook nodes.
+
+    """
+    sheets = [{'name': f'Sheet {index}'} for index in range(sheet_count)]
+    dashboards = [{'name': f'Dashboard {index}'} for index in range(sheet_count // 4)]
+
+    return [{'name': f'Workbook {index % 1000}',
+             'id': f'{index:08d}-2222-2222-2222-222222222222',
+             'sheets': sheets + sheets,
+             'dashboards': dashboards}
+            for index in range(workbook_count)]
+
+
+def aggregate_lists(nodes) -> dict:
+    workbooks = {}
+
+    for node in nodes:
+
+        if node['name'] not in workbooks:
+            workbooks[node['name']] = {}
+            workbooks[node['name']]['Dashboards'] = []
+            workbooks[node['name']]['Worksheets'] = []
+
+        for sheet in node['sheets']:
+
+            if sheet['name'] not in workbooks[node['name']]['Worksheets']:
+                workbooks[node['name']]['Worksheets'].append(sheet['name'])
+
+        for dashboard in node['dashboards']:
+
+            if dashboard['name'] not in workbooks[node['name']]['Dashboards']:
+                workbooks[node['name']]['Dashboards'].append(dashboard['name'])
+
+    return workbooks
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmark workbook aggregation")
+    parser.add_argument('--workbooks', type=int, default=10000, help='number of workbooks')
+    parser.add_argument('--sheets', type=int, default=200, help='sheets per workbook')
+
+    args = parser.parse_args()
+
+    nodes = build_nodes(args.workbooks, args.sheets)
+
+    print(f"{'aggregation':<22} {'seconds':>9} {'workbooks':>10}")
+
+    for name, aggregate in [('list membership', aggregate_lists),
+                            ('aggregate_workbooks', aggregate_workbooks)]:
+        start = time.perf_counter()
+        workbooks = aggregate(nodes)
+        elapsed = time.perf_counter() - start
+
+        print(f'{name:<22} {elapsed:>9.2f} {len(workbooks):>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+import csv
+import itertools
+import json
+import os
+
+from abc import ABC, abstractmethod
+from json.encoder import encode_basestring
+
+DEFAULT_BATCH_SIZE = 10000
+WORKBOOK_COLUMNS = ('Type', 'Name', 'Workbook Id', 'Workbook', 'Sheet Count',
+                    'Dashboard Count')
+# Arrow types of columns that are not strings.
+COLUMN_TYPES = {
+    'Sheet Count': 'int64',
+    'Dashboard Count': 'int64',
+}
+ARROW_FORMATS = ('parquet', 'arrow')
+EXPORT_FORMATS = {
+    '.csv': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+    '.parquet': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+}
+
+
+class ExportWriter(ABC):
+    """Streaming writer of inventory rows to a file.
+
+    Rows are buffered into batches of batch_size and each batch is written
+    as soon as it is full, so an inventory of any size is exported while it
+    is still being fetched and only one batch is ever held in memory.
+
+    Args:
+        path (str): Path of the export file.
+        columns (tuple): Column names, in the order of each row's values.
+        batch_size (int): Rows written at a time.
+
+    """
+
+    def __init__(self, path: str, columns: tuple, batch_size: int = DEFAULT_BATCH_SIZE):
+        if batch_size < 1:
+            raise ValueError(f'Batch size must be at least 1, got {batch_size}')
+
+        self.path = path
+        self.columns = tuple(columns)
+        self.batch_size = batch_size
+        self.rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, rows) -> int:
+        """Write rows in batches of batch_size.
+
+        Args:
+            rows (iterable): Tuples of column values, e.g. Site records.
+
+        Returns:
+            int: Total number of rows written so far.
+
+        """
+        rows = iter(rows)
+
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+
+            if not batch:
+                return self.rows
+
+            self.write_batch(batch)
+            self.rows += len(batch)
+
+    @abstractmethod
+    def write_batch(self, batch: list):
+        """Write one batch of rows.
+
+        Args:
+            batch (list): Tuples of column values.
+
+        """
+
+    @abstractmethod
+    def close(self):
+        """Flush and close the export file."""
+
+
+class CsvExportWriter(ExportWriter):
+    """Write rows as CSV with a header row."""
+
+    def __init__(self, path: str, columns: tuple, batch_size: int = DEFAULT_BATCH_SIZE):
+        super().__init__(path, columns, batch_size)
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.columns)
+
+    def write_batch(self, batch: list):
+        self.writer.writerows(batch)
+
+    def close(self):
+        self.file.close()
+
+
+class NdjsonExportWriter(ExportWriter):
+    """Write rows as newline-delimited JSON objects keyed by column.
+
+    The column keys are encoded once, so each row only encodes its values.
+
+    """
+
+    def __init__(self, path: str, columns: tuple, batch_size: int = DEFAULT_BATCH_SIZE):
+        super().__init__(path, columns, batch_size)
+        self.file = open(path, 'w', encoding='utf-8')
+        self.keys = [f'{encode_basestring(column)}: ' for column in self.columns]
+
+    def write_batch(self, batch: list):
+        keys = self.keys
+        self.file.write(''.join(
+            f"{{{', '.join([key + encode_json(value) for key, value in zip(keys, row)])}}}\n"
+            for row in batch))
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetExportWriter(ExportWriter):
+    """Write rows as a Parquet file with one row group per batch.
+
+    Columns in COLUMN_TYPES are stored with that type and every other column
+    as a string. Requires pyarrow.
+
+    """
+
+    def __init__(self, path: str, columns: tuple, batch_size: int = DEFAULT_BATCH_SIZE):
+        import pyarrow.parquet
+
+        super().__init__(path, columns, batch_size)
+        self.schema = arrow_schema(self.columns)
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+
+    def write_batch(self, batch: list):
+        self.writer.write_batch(to_record_batch(batch, self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class ArrowExportWriter(ExportWriter):
+    """Write rows as an Arrow IPC (Feather v2) file with one record batch per
+    batch.
+
+    Columns in COLUMN_TYPES are stored with that type and every other column
+    as a string. Requires pyarrow.
+
+    """
+
+    def __init__(self, path: str, columns: tuple, batch_size: int = DEFAULT_BATCH_SIZE):
+        import pyarrow
+        import pyarrow.ipc
+
+        super().__init__(path, columns, batch_size)
+        self.schema = arrow_schema(self.columns)
+        self.sink = pyarrow.OSFile(path, 'wb')
+        self.writer = pyarrow.ipc.new_file(self.sink, self.schema)
+
+    def write_batch(self, batch: list):
+        self.writer.write_batch(to_record_batch(batch, self.schema))
+
+    def close(self):
+        try:
+            self.writer.close()
+        finally:
+            self.sink.close()
+
+
+EXPORT_WRITERS = {
+    'csv': CsvExportWriter,
+    'ndjson': NdjsonExportWriter,
+    'parquet': ParquetExportWriter,
+    'arrow': ArrowExportWriter,
+}
+
+
+def open_export(path: str, columns: tuple, export_format: str = None,
+                batch_size: int = DEFAULT_BATCH_SIZE) -> ExportWriter:
+    """Open a streaming export writer.
+
+    Args:
+        path (str): Path of the export file.
+        columns (tuple): Column names, in the order of each row's values.
+        export_format (str): csv, ndjson, parquet or arrow. Inferred from the
+            file extension if None.
+        batch_size (int): Rows written at a time.
+
+    Returns:
+        ExportWriter: Writer for the format.
+
+    """
+    if export_format is None:
+        extension = os.path.splitext(path)[1].lower()
+
+        if extension not in EXPORT_FORMATS:
+            raise ValueError(f'Cannot infer the export format of {path}, use one of '
+                             f"{', '.join(EXPORT_FORMATS)} or pass export_format")
+
+        export_format = EXPORT_FORMATS[extension]
+
+    if export_format not in EXPORT_WRITERS:
+        raise ValueError(f'Unknown export format {export_format}, use one of '
+                         f"{', '.join(EXPORT_WRITERS)}")
+
+    if export_format in ARROW_FORMATS:
+        # pyarrow is optional and slow to import, so it is only loaded here.
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError(f'Exporting {export_format} requires pyarrow, '
+                              'install it with pip install pyarrow') from None
+
+    return EXPORT_WRITERS[export_format](path, columns, batch_size)
+
+
+def workbook_rows(nodes):
+    """Flatten workbook nodes into one row per workbook, sheet and dashboard.
+
+    Sheet and dashboard names are de-duplicated within each workbook, as in
+    aggregate_workbooks, but nothing is kept across nodes, so rows stream as
+    the nodes arrive. Workbook rows carry the sheet and dashboard counts when
+    the nodes were queried with the sheetCount or dashboardCount fields.
+
+    Args:
+        nodes (iterable): Workbook nodes, e.g. from iter_workbook_nodes.
+
+    Yields:
+        tuple: Type (Workbook, Worksheet or Dashboard), Name, Workbook Id,
+            Workbook name, Sheet Count and Dashboard Count, as in
+            WORKBOOK_COLUMNS. Counts are None unless known.
+
+    """
+    for node in nodes:
+        workbook_id, workbook = node['id'], node.get('name')
+        sheet_count = node.get('sheetsConnection', {}).get('totalCount')
+        dashboard_count = node.get('dashboardsConnection', {}).get('totalCount')
+
+        yield 'Workbook', workbook, workbook_id, workbook, sheet_count, dashboard_count
+
+        for sheet in dict.fromkeys(sheet['name'] for sheet in node.get('sheets', ())):
+            yield 'Worksheet', sheet, workbook_id, workbook, None, None
+
+        for dashboard in dict.fromkeys(dashboard['name']
+                                       for dashboard in node.get('dashboards', ())):
+            yield 'Dashboard', dashboard, workbook_id, workbook, None, None
+
+
+def encode_json(value) -> str:
+    # Strings, counts and missing values skip the general purpose encoder.
+    if isinstance(value, str):
+        return encode_basestring(value)
+
+    if value is None:
+        return 'null'
+
+    if type(value) is int:
+        return str(value)
+
+    return json.dumps(value, ensure_ascii=False)
+
+
+def arrow_schema(columns: tuple) -> object:
+    import pyarrow
+
+    return pyarrow.schema([
+        (column, pyarrow.type_for_alias(COLUMN_TYPES.get(column, 'string')))
+        for column in columns])
+
+
+def to_record_batch(batch: list, schema: object) -> object:
+    import pyarrow
+
+    # Transpose the rows into columns for Arrow.
+    columns = zip(*batch)
+
+    return pyarrow.RecordBatch.from_arrays(
+        [pyarrow.array(column, field.type) for column, field in zip(columns, schema)],
+        schema=schema)
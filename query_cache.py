@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+DEFAULT_TTL = 600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class QueryCache:
+    """On-disk cache of Metadata API query results.
+
+    Results are keyed by server, site, user and a hash of the
+    whitespace-normalized query and its variables, and stored as
+    zlib-compressed JSON in SQLite. The cache file is only readable by the
+    current user.
+    Entries older than ttl seconds are never returned, and the least recently
+    used entries are evicted once the stored results exceed max_bytes.
+
+    Args:
+        path (str): Path of the SQLite cache file.
+        ttl (float): Seconds a result is reused.
+        max_bytes (int): Maximum total size of the compressed results.
+
+    """
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        path = os.path.expanduser(path)
+        os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+        os.chmod(path, 0o600)
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'key TEXT PRIMARY KEY, created REAL, accessed REAL, size INTEGER, '
+            'data BLOB)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    @staticmethod
+    def cache_key(server: str, site: str, principal: str, query: str,
+                  variables: dict = None) -> str:
+        """Hash a query into a cache key.
+
+        Args:
+            server (str): Tableau Server URL.
+            site (str): Tableau Server Site name as it appears in the URL.
+            principal (str): User the query runs as, since results are
+                filtered by their permissions.
+            query (str): GraphQL query; whitespace differences are ignored.
+            variables (dict): GraphQL query variables.
+
+        Returns:
+            str: Cache key.
+
+        """
+        normalized = json.dumps(
+            [server, site, principal, ' '.join(query.split()), variables],
+            sort_keys=True)
+
+        return hashlib.sha256(normalized.encode()).hexdigest()
+
+    def get(self, key: str) -> dict:
+        """Look up an unexpired result and mark it as recently used.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            dict: Query results, or None if not cached.
+
+        """
+        now = time.time()
+
+        with self._lock:
+            row = self.connection.execute(
+                'SELECT data FROM results WHERE key = ? AND created > ?',
+                (key, now - self.ttl)).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+
+            with self.connection:
+                self.connection.execute(
+                    'UPDATE results SET accessed = ? WHERE key = ?', (now, key))
+
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, results: dict):
+        """Store a result, evicting expired and least recently used entries.
+
+        Args:
+            key (str): Cache key.
+            results (dict): Query results.
+
+        """
+        data = zlib.compress(json.dumps(results, separators=(',', ':')).encode())
+        now = time.time()
+
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock, self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO results (key, created, accessed, size, data) '
+                'VALUES (?, ?, ?, ?, ?)', (key, now, now, len(data), data))
+            self.connection.execute(
+                'DELETE FROM results WHERE created <= ?', (now - self.ttl,))
+
+            total_bytes = self.connection.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+
+            if total_bytes > self.max_bytes:
+                evicted = []
+
+                for evict_key, size in self.connection.execute(
+                        'SELECT key, size FROM results ORDER BY accessed'):
+                    if total_bytes <= self.max_bytes:
+                        break
+
+                    evicted.append((evict_key,))
+                    total_bytes -= size
+
+                self.connection.executemany(
+                    'DELETE FROM results WHERE key = ?', evicted)
+
+    def stats(self) -> dict:
+        """Report cache hits, misses and the size of the stored results.
+
+        Returns:
+            dict: hits, misses, entries and bytes.
+
+        """
+        with self._lock:
+            entries, total_bytes = self.connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+
+        return {'hits': self.hits, 'misses': self.misses,
+                'entries': entries, 'bytes': total_bytes}
@@ -1,34 +1,79 @@
-
 import argparse
 import getpass
+import json
+import queue
+import sys
+import threading
+import time
+import weakref
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 import tableauserverclient as TSC
 
+import query_cache
 
-def main():
+from inventory_export import (DEFAULT_BATCH_SIZE, EXPORT_WRITERS, WORKBOOK_COLUMNS,
+                              open_export, workbook_rows)
+from query_cache import QueryCache
+from token_cache import DEFAULT_TTL, TokenCache
+
+DEFAULT_PAGE_SIZE = 500
+DEFAULT_QUERY_CACHE = '~/.tableau_metadata_cache.sqlite'
+# One sign in lock per server, so unrelated servers sign in concurrently.
+SIGN_IN_LOCKS = weakref.WeakKeyDictionary()
+SIGN_IN_LOCKS_LOCK = threading.Lock()
+DEFAULT_WORKBOOK_FIELDS = ('name', 'id', 'sheets', 'dashboards')
+WORKBOOK_FIELD_SELECTIONS = {
+    'sheets': 'sheets { name }',
+    'dashboards': 'dashboards { name }',
+    'sheetCount': 'sheetsConnection { totalCount }',
+    'dashboardCount': 'dashboardsConnection { totalCount }',
+}
 
-    metadata_query = """
-    {
-      workbooksConnection(first: 3) {
-        nodes {
-          name
-          id
-          sheets {
-            name
-          }
-          dashboards {
-            name
-          }
-        }
-      }
-    }
-    """
+
+def main():
 
     parser = argparse.ArgumentParser(description="Query Tableau Server Metadata API")
     parser.add_argument('--server', '-s', required=True, help='tableau server url')
     parser.add_argument('--username', '-u', required=True, help='username of tableau server user')
     parser.add_argument('--password', '-p', required=False, help='password of tableau server user')
     parser.add_argument('--site', '-n', default='', required=False, help='url namespace of tableau server site')
+    parser.add_argument('--page_size', type=int, default=DEFAULT_PAGE_SIZE, required=False,
+                        help='number of workbooks requested per Metadata API page')
+    parser.add_argument('--shard_by_project', action='store_true',
+                        help='crawl each project as a separate concurrent shard')
+    parser.add_argument('--workers', type=int, default=4, required=False,
+                        help='number of shards crawled concurrently')
+    parser.add_argument('--batch_shards', type=int, required=False,
+                        help='alias this many project shards into each query instead '
+                             'of crawling them on separate workers')
+    parser.add_argument('--fields', nargs='+', default=list(DEFAULT_WORKBOOK_FIELDS),
+                        help='workbook fields to request, e.g. name id sheetCount; '
+                             f"expanded: {', '.join(WORKBOOK_FIELD_SELECTIONS)}")
+    parser.add_argument('--query_stats', action='store_true',
+                        help='print response bytes and timings per query')
+    parser.add_argument('--token_cache', required=False,
+                        help='path of an auth token cache reused between runs')
+    parser.add_argument('--token_ttl', type=float, default=DEFAULT_TTL, required=False,
+                        help='seconds a cached auth token is reused')
+    parser.add_argument('--query_cache', default=DEFAULT_QUERY_CACHE, required=False,
+                        help='path of the Metadata API query result cache')
+    parser.add_argument('--query_cache_ttl', type=float, default=query_cache.DEFAULT_TTL,
+                        required=False, help='seconds a cached query result is reused')
+    parser.add_argument('--query_cache_bytes', type=int,
+                        default=query_cache.DEFAULT_MAX_BYTES, required=False,
+                        help='maximum size of the query result cache in bytes')
+    parser.add_argument('--no_query_cache', action='store_true',
+                        help='always query the server and skip the result cache')
+    parser.add_argument('--export', required=False,
+                        help='path of a .csv, .ndjson, .parquet or .arrow file workbook, '
+                             'sheet and dashboard rows are streamed to instead of printed')
+    parser.add_argument('--export_format', choices=list(EXPORT_WRITERS), required=False,
+                        help='format of --export if not inferred from its extension')
+    parser.add_argument('--batch_size', type=int, default=DEFAULT_BATCH_SIZE, required=False,
+                        help='rows written to --export at a time')
 
     args = parser.parse_args()
 
@@ -41,30 +86,583 @@ def main():
     server = TSC.Server(args.server)
     server.add_http_options({'verify': False})
     server.version = '3.5'
+    token_cache, results_cache = None, None
+
+    if args.token_cache:
+        token_cache = TokenCache(args.token_cache, args.token_ttl)
+
+    if not args.no_query_cache:
+        results_cache = QueryCache(args.query_cache, args.query_cache_ttl,
+                                   args.query_cache_bytes)
+
+    if 'id' not in args.fields:
+        args.fields.append('id')
+
+    query_stats = [] if args.query_stats else None
+    metadata_query = build_workbooks_query(args.fields)
+
+    with signed_in(server, tableau_auth, token_cache):
+
+        if args.batch_shards:
+            ensure_signed_in(server, tableau_auth, token_cache)
+            nodes = iter_batched_workbook_nodes(
+                server, tableau_auth, project_shards(server), args.batch_shards,
+                args.fields, args.page_size, token_cache,
+                query_cache=results_cache, query_stats=query_stats)
+        elif args.shard_by_project:
+            ensure_signed_in(server, tableau_auth, token_cache)
+            nodes = iter_sharded_workbook_nodes(
+                server, tableau_auth, project_shards(server), args.workers,
+                args.page_size, token_cache, metadata_query,
+                query_cache=results_cache, query_stats=query_stats)
+        else:
+            nodes = iter_workbook_nodes(server, tableau_auth, args.page_size,
+                                        token_cache, metadata_query,
+                                        query_cache=results_cache,
+                                        query_stats=query_stats)
+
+        if args.export:
+            with open_export(args.export, WORKBOOK_COLUMNS, args.export_format,
+                             args.batch_size) as writer:
+                writer.write(workbook_rows(nodes))
+        else:
+            workbooks = aggregate_workbooks(nodes)
+
+    if args.export:
+        print(f'Exported {writer.rows} rows to {args.export}')
+    else:
+        print(workbooks)
+
+    if query_stats is not None:
+        for stats in query_stats:
+            print(f'Query: {json.dumps(stats)}', file=sys.stderr)
+
+    if results_cache:
+        print(f'Query cache: {json.dumps(results_cache.stats())}', file=sys.stderr)
+        results_cache.close()
+
+
+def aggregate_workbooks(nodes) -> dict:
+    """Aggregate workbook nodes into their worksheets and dashboards.
+
+    Workbooks are keyed by id so same-named workbooks in different projects
+    stay separate. Worksheet and dashboard names are de-duplicated with
+    insertion-ordered dict keys and returned as lists in first-seen order.
+    Sheet and dashboard counts are included when the nodes were queried with
+    the sheetCount or dashboardCount fields.
+
+    Args:
+        nodes (iterable): Workbook nodes, e.g. from iter_workbook_nodes.
+
+    Returns:
+        dict: Name, Worksheets and Dashboards keyed by workbook id.
+
+    """
     workbooks = {}
 
-    with server.auth.sign_in(tableau_auth):
+    for node in nodes:
+
+        if node['id'] not in workbooks:
+            workbooks[node['id']] = {}
+            workbooks[node['id']]['Name'] = node.get('name')
+            workbooks[node['id']]['Dashboards'] = {}
+            workbooks[node['id']]['Worksheets'] = {}
+
+        worksheets = workbooks[node['id']]['Worksheets']
+        dashboards = workbooks[node['id']]['Dashboards']
+
+        for sheet in node.get('sheets', ()):
+            worksheets[sheet['name']] = None
+
+        for dashboard in node.get('dashboards', ()):
+            dashboards[dashboard['name']] = None
+
+        if 'sheetsConnection' in node:
+            workbooks[node['id']]['Worksheet Count'] = node['sheetsConnection']['totalCount']
+
+        if 'dashboardsConnection' in node:
+            workbooks[node['id']]['Dashboard Count'] = node['dashboardsConnection']['totalCount']
+
+    for workbook in workbooks.values():
+        workbook['Dashboards'] = list(workbook['Dashboards'])
+        workbook['Worksheets'] = list(workbook['Worksheets'])
+
+    return workbooks
+
+
+def build_workbooks_query(fields=DEFAULT_WORKBOOK_FIELDS, shard_count: int = None) -> str:
+    """Build a workbooksConnection query selecting only the requested fields.
+
+    Fields named in WORKBOOK_FIELD_SELECTIONS expand to their sub-selection,
+    e.g. sheetCount requests sheetsConnection { totalCount } rather than
+    every sheet name; any other field is selected as-is. Without shard_count
+    the query takes $first, $afterToken and $filter like WORKBOOKS_QUERY.
+    With it, shard_count aliased connections shard0, shard1, ... are batched
+    into one query, each with its own $afterN and $filterN variables.
+
+    Args:
+        fields (iterable): Workbook fields to select.
+        shard_count (int): Number of aliased connections to batch.
+
+    Returns:
+        str: GraphQL query.
+
+    """
+    selections = ' '.join(WORKBOOK_FIELD_SELECTIONS.get(field, field)
+                          for field in fields)
+
+    def connection(after: str, workbook_filter: str) -> str:
+        return (
+            f'workbooksConnection(first: $first, after: ${after}, '
+            f'filter: ${workbook_filter}) {{ nodes {{ {selections} }} '
+            'pageInfo { hasNextPage endCursor } }'
+        )
+
+    if shard_count is None:
+        return (
+            'query workbooks($first: Int, $afterToken: String, $filter: WorkbookFilter) '
+            f"{{ {connection('afterToken', 'filter')} }}"
+        )
+
+    variables = ''.join(f', $after{index}: String, $filter{index}: WorkbookFilter'
+                        for index in range(shard_count))
+    connections = ' '.join(
+        f"shard{index}: {connection(f'after{index}', f'filter{index}')}"
+        for index in range(shard_count))
+
+    return f'query workbooks($first: Int{variables}) {{ {connections} }}'
+
+
+WORKBOOKS_QUERY = build_workbooks_query()
+
+
+def iter_workbook_nodes(server: object, tableau_auth: object,
+                        page_size: int = DEFAULT_PAGE_SIZE,
+                        token_cache: TokenCache = None,
+                        metadata_query: str = WORKBOOKS_QUERY,
+                        workbook_filter: dict = None,
+                        query_cache: QueryCache = None,
+                        query_stats: list = None):
+    """Stream workbook nodes from the Metadata API, one page at a time.
+
+    Args:
+        server (object): Signed in Tableau Server Client server.
+        tableau_auth (object): Tableau Server Client credentials.
+        page_size (int): Number of workbooks requested per page.
+        token_cache (TokenCache): Optional on-disk cache of auth tokens.
+        metadata_query (str): GraphQL query taking $first, $afterToken and
+            $filter variables and returning workbooksConnection nodes and
+            pageInfo.
+        workbook_filter (dict): Optional WorkbookFilter, e.g. a projectName.
+        query_cache (QueryCache): Optional on-disk cache of query results.
+        query_stats (list): Optional list each query's stats are appended to.
+
+    Yields:
+        dict: Workbook node.
+
+    """
+    for nodes in iter_workbook_pages(server, tableau_auth, page_size, token_cache,
+                                     metadata_query, workbook_filter, query_cache,
+                                     query_stats):
+        yield from nodes
+
+
+def iter_workbook_pages(server: object, tableau_auth: object,
+                        page_size: int = DEFAULT_PAGE_SIZE,
+                        token_cache: TokenCache = None,
+                        metadata_query: str = WORKBOOKS_QUERY,
+                        workbook_filter: dict = None,
+                        query_cache: QueryCache = None,
+                        query_stats: list = None):
+    """Stream pages of workbook nodes from the Metadata API.
+
+    Follows workbooksConnection pageInfo until hasNextPage is false, so only
+    a single page of nodes is held in memory at once.
+
+    Args:
+        server (object): Signed in Tableau Server Client server.
+        tableau_auth (object): Tableau Server Client credentials.
+        page_size (int): Number of workbooks requested per page.
+        token_cache (TokenCache): Optional on-disk cache of auth tokens.
+        metadata_query (str): GraphQL query taking $first, $afterToken and
+            $filter variables and returning workbooksConnection nodes and
+            pageInfo.
+        workbook_filter (dict): Optional WorkbookFilter, e.g. a projectName.
+        query_cache (QueryCache): Optional on-disk cache of query results.
+        query_stats (list): Optional list each query's stats are appended to.
+
+    Yields:
+        list: Workbook nodes of each page.
+
+    """
+    if page_size < 1:
+        raise ValueError(f'Page size must be at least 1, got {page_size}')
+
+    variables = {'first': page_size, 'afterToken': None, 'filter': workbook_filter}
+
+    while True:
+        results = query_metadata(server, tableau_auth, metadata_query,
+                                 token_cache, variables, query_cache, query_stats)
+        connection = results['data']['workbooksConnection']
+
+        yield connection['nodes']
+
+        if not connection['pageInfo']['hasNextPage']:
+            break
+
+        variables['afterToken'] = connection['pageInfo']['endCursor']
+
+
+def iter_sharded_workbook_nodes(server: object, tableau_auth: object, shards,
+                                workers: int = 4,
+                                page_size: int = DEFAULT_PAGE_SIZE,
+                                token_cache: TokenCache = None,
+                                metadata_query: str = WORKBOOKS_QUERY,
+                                query_cache: QueryCache = None,
+                                query_stats: list = None):
+    """Crawl several workbook filters concurrently and merge their nodes.
+
+    Each shard's cursor chain runs on its own worker, with at most workers
+    chains in flight. Pages are handed over through a bounded queue, so slow
+    consumers apply backpressure rather than buffering the whole server.
+    Nodes are yielded in the order pages arrive.
+
+    Args:
+        server (object): Signed in Tableau Server Client server.
+        tableau_auth (object): Tableau Server Client credentials.
+        shards (iterable): WorkbookFilter dicts, e.g. from project_shards.
+        workers (int): Maximum number of shards crawled at the same time.
+        page_size (int): Number of workbooks requested per page.
+        token_cache (TokenCache): Optional on-disk cache of auth tokens.
+        metadata_query (str): GraphQL query as for iter_workbook_pages.
+        query_cache (QueryCache): Optional on-disk cache of query results.
+        query_stats (list): Optional list each query's stats are appended to.
+
+    Yields:
+        dict: Workbook node.
+
+    """
+    if workers < 1:
+        raise ValueError(f'Workers must be at least 1, got {workers}')
+
+    shards = list(shards)
+    pages = queue.Queue(maxsize=workers * 2)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+
+        return False
+
+    def crawl_shard(workbook_filter: dict):
+        try:
+            if stopped.is_set():
+                return
+
+            for nodes in iter_workbook_pages(server, tableau_auth, page_size,
+                                             token_cache, metadata_query,
+                                             workbook_filter, query_cache,
+                                             query_stats):
+                if not put(nodes):
+                    return
+        except Exception as e:
+            put(e)
+        finally:
+            put(None)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for workbook_filter in shards:
+            executor.submit(crawl_shard, workbook_filter)
+
+        try:
+            remaining = len(shards)
 
-        results = server.metadata.query(metadata_query)
+            while remaining:
+                nodes = pages.get()
 
-    for node in results['data']['workbooksConnection']['nodes']:
+                if nodes is None:
+                    remaining -= 1
+                elif isinstance(nodes, Exception):
+                    raise nodes
+                else:
+                    yield from nodes
 
-        if node['name'] not in workbooks:
-            workbooks[node['name']] = {}
-            workbooks[node['name']]['Dashboards'] = []
-            workbooks[node['name']]['Worksheets'] = []
+        finally:
+            stopped.set()
 
-        for sheet in node['sheets']:
 
-            if sheet['name'] not in workbooks[node['name']]['Worksheets']:
-                workbooks[node['name']]['Worksheets'].append(sheet['name'])
+def run_metadata_query(server: object, metadata_query: str, variables: dict = None,
+                       query_stats: list = None) -> dict:
+    """Send a Metadata API query, optionally measuring it.
 
-        for dashboard in node['dashboards']:
+    With query_stats, the response bytes, round-trip seconds and JSON parse
+    seconds of the query are appended to it.
 
-            if dashboard['name'] not in workbooks[node['name']]['Dashboards']:
-                workbooks[node['name']]['Dashboards'].append(dashboard['name'])
+    Args:
+        server (object): Signed in Tableau Server Client server.
+        metadata_query (str): GraphQL query.
+        variables (dict): GraphQL query variables.
+        query_stats (list): Optional list the query's stats are appended to.
 
-    print(workbooks)
+    Returns:
+        dict: Metadata API query results.
+
+    """
+    if query_stats is None:
+        return server.metadata.query(metadata_query, variables, abort_on_error=True)
+
+    start = time.perf_counter()
+    api_response = server.metadata.post_request(
+        server.metadata.baseurl,
+        json.dumps({'query': metadata_query, 'variables': variables}),
+        content_type='application/json')
+    received = time.perf_counter()
+    results = json.loads(api_response.content)
+
+    query_stats.append({
+        'bytes': len(api_response.content),
+        'request_seconds': received - start,
+        'parse_seconds': time.perf_counter() - received,
+    })
+
+    if results.get('errors'):
+        raise Exception(f"Error querying the Metadata API\nErrors: {results['errors']}")
+
+    return results
+
+
+def iter_batched_workbook_nodes(server: object, tableau_auth: object, shards,
+                                batch_size: int = 10,
+                                fields=DEFAULT_WORKBOOK_FIELDS,
+                                page_size: int = DEFAULT_PAGE_SIZE,
+                                token_cache: TokenCache = None,
+                                query_cache: QueryCache = None,
+                                query_stats: list = None):
+    """Crawl several workbook filters with their pages batched into one query.
+
+    Up to batch_size shards that still have pages left are aliased into each
+    round trip, so the number of queries is set by the longest shard rather
+    than by the sum of all shards' pages.
+
+    Args:
+        server (object): Signed in Tableau Server Client server.
+        tableau_auth (object): Tableau Server Client credentials.
+        shards (iterable): WorkbookFilter dicts, e.g. from project_shards.
+        batch_size (int): Maximum number of shards per query.
+        fields (iterable): Workbook fields to select.
+        page_size (int): Number of workbooks requested per shard per query.
+        token_cache (TokenCache): Optional on-disk cache of auth tokens.
+        query_cache (QueryCache): Optional on-disk cache of query results.
+        query_stats (list): Optional list each query's stats are appended to.
+
+    Yields:
+        dict: Workbook node.
+
+    """
+    if batch_size < 1:
+        raise ValueError(f'Batch size must be at least 1, got {batch_size}')
+
+    active = [[workbook_filter, None] for workbook_filter in shards]
+
+    while active:
+        batch = active[:batch_size]
+        variables = {'first': page_size}
+
+        for index, (workbook_filter, cursor) in enumerate(batch):
+            variables[f'after{index}'] = cursor
+            variables[f'filter{index}'] = workbook_filter
+
+        results = query_metadata(server, tableau_auth,
+                                 build_workbooks_query(fields, len(batch)),
+                                 token_cache, variables, query_cache, query_stats)
+
+        for index, shard in enumerate(batch):
+            connection = results['data'][f'shard{index}']
+
+            yield from connection['nodes']
+
+            if connection['pageInfo']['hasNextPage']:
+                shard[1] = connection['pageInfo']['endCursor']
+            else:
+                shard[1] = False
+
+        active = [shard for shard in active if shard[1] is not False]
+
+
+def project_shards(server: object) -> list:
+    """List one projectName WorkbookFilter per distinct project name.
+
+    Args:
+        server (object): Signed in Tableau Server Client server.
+
+    Returns:
+        list: WorkbookFilter dicts.
+
+    """
+    project_names = dict.fromkeys(project.name
+                                  for project in TSC.Pager(server.projects))
+
+    return [{'projectName': project_name} for project_name in project_names]
+
+
+@contextmanager
+def signed_in(server: object, tableau_auth: object, token_cache: TokenCache = None):
+    """Scope a lazily signed in session on the server.
+
+    Nothing is sent until query_metadata or ensure_signed_in first needs the
+    server, so runs answered entirely from the query cache never sign in.
+    Without a token cache the server is signed out again on exit. With one,
+    the session is left signed in so the cached token stays valid for later
+    runs.
+
+    Args:
+        server (object): Tableau Server Client server.
+        tableau_auth (object): Tableau Server Client credentials.
+        token_cache (TokenCache): Optional on-disk cache of auth tokens.
+
+    Yields:
+        object: The server.
+
+    """
+    try:
+        yield server
+    finally:
+        if token_cache is None and server.is_signed_in():
+            server.auth.sign_out()
+
+
+def ensure_signed_in(server: object, tableau_auth: object,
+                     token_cache: TokenCache = None):
+    """Sign in to the server unless it already is.
+
+    With a token cache, a cached token is restored without contacting the
+    server.
+
+    Args:
+        server (object): Tableau Server Client server.
+        tableau_auth (object): Tableau Server Client credentials.
+        token_cache (TokenCache): Optional on-disk cache of auth tokens.
+
+    """
+    with sign_in_lock(server):
+        if server.is_signed_in():
+            return
+
+        if token_cache is None:
+            server.auth.sign_in(tableau_auth)
+            return
+
+        cached = token_cache.get(*token_cache_key(server, tableau_auth))
+
+        if cached:
+            server._set_auth(cached['site_id'], cached['user_id'], cached['token'])
+        else:
+            sign_in_cached(server, tableau_auth, token_cache)
+
+
+def query_metadata(server: object, tableau_auth: object, metadata_query: str,
+                   token_cache: TokenCache = None, variables: dict = None,
+                   query_cache: QueryCache = None, query_stats: list = None) -> dict:
+    """Run a Metadata API query, signing in first if needed.
+
+    With a query cache, an unexpired cached result is returned without
+    contacting the server. With a token cache, a query rejected as
+    unauthorized evicts the cached token, signs in again and is retried once.
+
+    Args:
+        server (object): Tableau Server Client server.
+        tableau_auth (object): Tableau Server Client credentials.
+        metadata_query (str): GraphQL query.
+        token_cache (TokenCache): Optional on-disk cache of auth tokens.
+        variables (dict): GraphQL query variables.
+        query_cache (QueryCache): Optional on-disk cache of query results.
+        query_stats (list): Optional list each query's stats are appended to.
+
+    Returns:
+        dict: Metadata API query results.
+
+    """
+    cache_key = None
+
+    if query_cache:
+        # Results are filtered by the user's permissions, so the user is part
+        # of the key.
+        cache_key = QueryCache.cache_key(*token_cache_key(server, tableau_auth),
+                                         metadata_query, variables)
+        results = query_cache.get(cache_key)
+
+        if results is not None:
+            return results
+
+    ensure_signed_in(server, tableau_auth, token_cache)
+
+    try:
+        results = run_metadata_query(server, metadata_query, variables, query_stats)
+    except Exception as e:
+        if token_cache is None or not is_unauthorized(e):
+            raise
+
+        with sign_in_lock(server):
+            token_cache.remove(*token_cache_key(server, tableau_auth))
+            sign_in_cached(server, tableau_auth, token_cache)
+
+        results = run_metadata_query(server, metadata_query, variables, query_stats)
+
+    if query_cache:
+        query_cache.put(cache_key, results)
+
+    return results
+
+
+def sign_in_lock(server: object) -> object:
+    """Get the lock serializing sign in to a server.
+
+    Args:
+        server (object): Tableau Server Client server.
+
+    Returns:
+        object: Reentrant lock of the server.
+
+    """
+    with SIGN_IN_LOCKS_LOCK:
+        return SIGN_IN_LOCKS.setdefault(server, threading.RLock())
+
+
+def sign_in_cached(server: object, tableau_auth: object, token_cache: TokenCache):
+    """Sign in to the server and cache the new auth token.
+
+    Args:
+        server (object): Tableau Server Client server.
+        tableau_auth (object): Tableau Server Client credentials.
+        token_cache (TokenCache): On-disk cache of auth tokens.
+
+    """
+    server.auth.sign_in(tableau_auth)
+    token_cache.put(*token_cache_key(server, tableau_auth), server.auth_token,
+                    server.site_id, server.user_id)
+
+
+def token_cache_key(server: object, tableau_auth: object) -> tuple:
+    return server.server_address, tableau_auth.site_id, tableau_auth.username
+
+
+def is_unauthorized(error: Exception) -> bool:
+    """Check whether a Tableau Server Client error is a 401.
+
+    Args:
+        error (Exception): Error raised by Tableau Server Client.
+
+    Returns:
+        bool: True if the auth token was rejected.
+
+    """
+    return (isinstance(error, TSC.NotSignedInError)
+            or str(getattr(error, 'code', '')).startswith('401'))
 
 
 if __name__ == '__main__':
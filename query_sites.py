@@ -1,11 +1,73 @@
 
 import argparse
+import atexit
 import getpass
+import io
+import itertools
+import math
 import requests
+import sys
+import threading
+import time
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
 from xml.etree import ElementTree as ET
 
+from inventory_export import DEFAULT_BATCH_SIZE, EXPORT_WRITERS, open_export
+from rest_session import RateLimiter, RequestStats, ResilientSession
+from site_snapshot import SiteSnapshot, diff_sites
+from token_cache import DEFAULT_TTL, TokenCache
+
 NAMESPACE = {'t': 'http://tableau.com/api'}
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+PAGINATION_TAG = f"{{{NAMESPACE['t']}}}pagination"
+SITE_TAG = f"{{{NAMESPACE['t']}}}site"
+SITES_TAG = f"{{{NAMESPACE['t']}}}sites"
+SITE_COLUMNS = ('Name', 'Luid', 'Url Namespace', 'State')
+
+
+class Site(NamedTuple):
+    """Compact record of a Tableau Server Site."""
+
+    name: str
+    luid: str
+    url_namespace: str
+    state: str
+
+    @classmethod
+    def from_attrib(cls, site: dict) -> 'Site':
+        """Build a Site from the attributes of a t:site element.
+
+        Args:
+            site (dict): Attributes of a t:site element.
+
+        Returns:
+            Site: Site record.
+
+        """
+        return cls(site['name'], site['id'], site['contentUrl'],
+                   sys.intern(site['state']))
+
+    def to_dict(self) -> dict:
+        """Convert the Site to the Name, Luid, Url Namespace, State dict.
+
+        Returns:
+            dict: Name, Luid, Url Namespace and State of the site.
+
+        """
+        return dict(zip(SITE_COLUMNS, self))
+
+
+class SiteResult(NamedTuple):
+    """Outcome of a per-site query run by fan_out_sites."""
+
+    site: Site
+    result: object
+    seconds: float
+    error: str
 
 
 def main():
@@ -16,13 +78,44 @@ def main():
     parser.add_argument('--username', '-u', required=False, help='username of tableau server user')
     parser.add_argument('--token', '-t', required=False, help='personal access token name')
     parser.add_argument('--https_cert', '-c', required=False, help='path to HTTPS cert')
+    parser.add_argument('--concurrency', '-w', type=int, default=1, required=False,
+                        help='number of site pages fetched concurrently')
+    parser.add_argument('--pool_size', type=int, default=10, required=False,
+                        help='number of pooled HTTP connections kept open')
+    parser.add_argument('--page_size', type=int, required=False,
+                        help=f'number of sites requested per page (max {MAX_PAGE_SIZE})')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='start at --page_size and halve it on errors or slow pages')
+    parser.add_argument('--token_cache', required=False,
+                        help='path of an auth token cache reused between runs')
+    parser.add_argument('--token_ttl', type=float, default=DEFAULT_TTL, required=False,
+                        help='seconds a cached auth token is reused')
+    parser.add_argument('--snapshot', required=False,
+                        help='path of a site snapshot; only changes since it are printed')
+    parser.add_argument('--fan_out', action='store_true',
+                        help='sign in to every active site and query its usage')
+    parser.add_argument('--workers', type=int, default=4, required=False,
+                        help='number of sites queried concurrently with --fan_out')
+    parser.add_argument('--rate_limit', type=float, required=False,
+                        help='maximum requests per second sent to the server')
+    parser.add_argument('--max_retries', type=int, default=3, required=False,
+                        help='retries of connection errors and 429/5xx responses')
+    parser.add_argument('--stats', action='store_true',
+                        help='print per-endpoint request stats as JSON at exit')
+    parser.add_argument('--export', required=False,
+                        help='path of a .csv, .ndjson, .parquet or .arrow file the sites '
+                             'are streamed to instead of being printed')
+    parser.add_argument('--export_format', choices=list(EXPORT_WRITERS), required=False,
+                        help='format of --export if not inferred from its extension')
+    parser.add_argument('--batch_size', type=int, default=DEFAULT_BATCH_SIZE, required=False,
+                        help='sites written to --export at a time')
 
     args = parser.parse_args()
 
     if not args.username and not args.token:
         raise ValueError('Either username or token must be defined in command line')
 
-    auth_value, auth_secret, auth_method, auth_token = None, None, None, None
+    auth_value, auth_secret, auth_method = None, None, None
 
     if args.username:
         auth_value = args.username
@@ -39,85 +132,714 @@ def main():
     else:
         verify_ssl = False
 
+    if args.page_size:
+        page_size = args.page_size
+    elif args.adaptive:
+        page_size = MAX_PAGE_SIZE
+    else:
+        page_size = DEFAULT_PAGE_SIZE
+
     api_url = f'{args.server}/api/{args.version}'
+    token_cache = None
 
-    try:
-        auth_token = api_sign_in(api_url, auth_method, auth_value, auth_secret,
-                                 '', verify_ssl)
-        sites = api_query_sites(api_url, auth_token, verify_ssl)
+    if args.token_cache:
+        token_cache = TokenCache(args.token_cache, args.token_ttl)
 
-        for site in sites:
-            print(f'{sites[site]}\n')
+    client_options = {'max_retries': args.max_retries,
+                      'request_stats': RequestStats()}
+
+    if args.rate_limit:
+        client_options['rate_limiter'] = RateLimiter(
+            args.rate_limit, max(args.concurrency, args.workers))
+
+    if args.stats:
+        atexit.register(
+            lambda: print(client_options['request_stats'].to_json(), file=sys.stderr))
+
+    with TableauRestClient(api_url, verify_ssl,
+                           pool_size=max(args.pool_size, args.concurrency),
+                           token_cache=token_cache, **client_options) as client:
+
+        try:
+            client.sign_in(auth_method, auth_value, auth_secret, '')
+            page_stats = {}
+
+            if args.adaptive:
+                sites = client.iter_sites_adaptive(
+                    page_size, min_page_size=min(page_size, DEFAULT_PAGE_SIZE),
+                    page_stats=page_stats)
+            else:
+                sites = client.iter_sites(args.concurrency, page_size)
+
+            if args.fan_out:
+                # The snapshot and export still get every site, only the fan
+                # out is limited to active sites.
+                sites = list(sites)
+                active_sites = [site for site in sites if site.state == 'Active']
+
+            if args.snapshot:
+                with SiteSnapshot(args.snapshot) as snapshot:
+                    changes = snapshot.apply(
+                        diff_sites(snapshot.load(Site._make), sites))
+
+                for change in changes:
+                    print(f'{change.change}: {change.site.to_dict()}\n')
+
+                print(f'{len(changes)} sites changed since the last snapshot')
+
+            elif args.export:
+                with open_export(args.export, SITE_COLUMNS, args.export_format,
+                                 args.batch_size) as writer:
+                    print(f'Exported {writer.write(sites)} sites to {args.export}')
+
+            else:
+                for site in sites:
+                    print(f'{site.to_dict()}\n')
+
+            if args.adaptive:
+                print(f"Page size: {page_stats['page_size']} "
+                      f"({page_stats['requests']} requests)")
+
+        except Exception as e:
+            print(e)
+            return
+
+    if args.fan_out:
+        failures = 0
+
+        for site_result in fan_out_sites(
+                api_url, verify_ssl, auth_method, auth_value, auth_secret, active_sites,
+                lambda site_client, site: site_client.query_site(site.luid),
+                args.workers, token_cache, **client_options):
+
+            if site_result.error:
+                failures += 1
+                print(f'{site_result.site.name} failed after '
+                      f'{site_result.seconds:.2f}s: {site_result.error}\n')
+            else:
+                print(f'{site_result.site.name} ({site_result.seconds:.2f}s): '
+                      f'{site_result.result}\n')
+
+        print(f'Queried {len(active_sites)} sites with {failures} failures')
+
+
+class TableauRestClient:
+    """Tableau Server REST API client sharing one pooled, keep-alive session.
+
+    Sign in, site queries and sign out all go through the same
+    ResilientSession, so the TCP and TLS connection is reused between calls,
+    the auth token and SSL verification are configured only once, and
+    transient failures are retried instead of aborting a long crawl.
+
+    With a token_cache, sign in reuses a cached token without contacting the
+    server. The token is validated lazily: the first call answered with a 401
+    signs in again, updates the cache and is retried once. Sign out is skipped
+    while the token is still cached so later runs can reuse it.
+
+    Args:
+        server_url (str): Tableau Server API URL.
+        verify_ssl (str): Path to HTTPS cert. False if HTTP Request will be sent.
+        pool_size (int): Maximum number of pooled connections kept open.
+        keep_alive (bool): Reuse connections between requests.
+        token_cache (TokenCache): Optional on-disk cache of auth tokens.
+        rate_limiter (RateLimiter): Optional limiter shared between clients.
+        max_retries (int): Retries of connection errors and 429/5xx responses.
+        request_stats (RequestStats): Optional per-endpoint timing stats shared
+            between clients.
+
+    """
+
+    def __init__(self, server_url: str, verify_ssl: str, pool_size: int = 10,
+                 keep_alive: bool = True, token_cache: TokenCache = None,
+                 rate_limiter: RateLimiter = None, max_retries: int = 3,
+                 request_stats: RequestStats = None):
+        self.server_url = server_url
+        self.verify_ssl = verify_ssl
+        self.token_cache = token_cache
+        self.auth_token = None
+        self.site_url_namespace = ''
+        self._credentials = None
+        self._auth_lock = threading.Lock()
+
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size,
+                                                pool_maxsize=pool_size)
+
+        self.session = ResilientSession(rate_limiter, max_retries,
+                                        stats=request_stats)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.verify = verify_ssl
+        self.session.auth = self._apply_token
+        self.session.hooks['response'].append(self._reauthenticate)
+
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if self.auth_token:
+                self.sign_out()
+        finally:
+            self.session.close()
+
+    def sign_in(self, auth_method: str, auth_value: str, auth_secret: str,
+                site_url_namespace: str = '') -> str:
+        """Authenticate with a Site and store the token on the session.
+
+        Args:
+            auth_method (str): Token or Classic.
+            auth_value (str): Name of the Token or User.
+            auth_secret (str): Token Value or Password.
+            site_url_namespace (str): Tableau Server Site name as it appears
+                in the URL.
+
+        Returns:
+            str: Token used for API authentication.
+
+        """
+        self._credentials = (auth_method, auth_value, auth_secret)
+        self.site_url_namespace = site_url_namespace
+
+        cached = None
+        if self.token_cache:
+            cached = self.token_cache.get(self.server_url, site_url_namespace,
+                                          auth_value)
+
+        if cached:
+            self._set_token(cached['token'])
+        else:
+            self._sign_in()
+
+        return self.auth_token
+
+    def _sign_in(self):
+        auth_method, auth_value, auth_secret = self._credentials
+
+        self._set_token(api_sign_in(self.server_url, auth_method, auth_value,
+                                    auth_secret, self.site_url_namespace,
+                                    self.verify_ssl, self.session))
+
+        if self.token_cache:
+            self.token_cache.put(self.server_url, self.site_url_namespace,
+                                 auth_value, self.auth_token)
+
+    def _set_token(self, auth_token: str):
+        self.auth_token = auth_token
+        self.session.headers['X-tableau-auth'] = auth_token
+
+    def _apply_token(self, request: object) -> object:
+        # Calls made with a stale token argument pick up the current token.
+        if self.auth_token and 'X-tableau-auth' in request.headers:
+            request.headers['X-tableau-auth'] = self.auth_token
+
+        return request
+
+    def _reauthenticate(self, response: object, *args, **kwargs) -> object:
+        if (response.status_code != 401 or not self._credentials
+                or '/auth/' in response.request.url):
+            return response
+
+        # Release the 401's pooled connection before sign in and the retry
+        # need one.
+        response.content
+        response.close()
 
-    except Exception as e:
-        print(e)
+        with self._auth_lock:
+            if response.request.headers.get('X-tableau-auth') == self.auth_token:
+                self._sign_in()
 
-    finally:
-        api_sign_out(api_url, auth_token, '', verify_ssl)
+        retry = response.request.copy()
+        retry.headers['X-tableau-auth'] = self.auth_token
+        retry.hooks = {'response': []}
 
+        return self.session.send(retry, verify=self.verify_ssl)
 
-def api_query_sites(server_url: str, auth_token: str, verify_ssl: str) -> dict:
+    def query_sites(self, concurrency: int = 1,
+                    page_size: int = DEFAULT_PAGE_SIZE) -> dict:
+        """Query all the sites on the Tableau Server.
+
+        Args:
+            concurrency (int): Maximum number of pages fetched at the same time.
+            page_size (int): Number of sites requested per page.
+
+        Returns:
+            dict: Nested dictionary of Tableau Server Sites.
+
+        """
+        return api_query_sites(self.server_url, self.auth_token, self.verify_ssl,
+                               concurrency, self.session, page_size)
+
+    def iter_sites(self, concurrency: int = 1,
+                   page_size: int = DEFAULT_PAGE_SIZE):
+        """Stream the sites on the Tableau Server as each page arrives.
+
+        Args:
+            concurrency (int): Maximum number of pages fetched at the same time.
+            page_size (int): Number of sites requested per page.
+
+        Yields:
+            Site: Record of each site.
+
+        """
+        return iter_sites(self.server_url, self.auth_token, self.verify_ssl,
+                          concurrency, self.session, page_size)
+
+    def iter_sites_adaptive(self, page_size: int = MAX_PAGE_SIZE,
+                            page_stats: dict = None, **kwargs):
+        """Stream the sites on the Tableau Server with adaptive page sizing.
+
+        Args:
+            page_size (int): Number of sites requested on the first page.
+            page_stats (dict): Optional dict updated with the chosen page size
+                and the number of requests made.
+            **kwargs: Passed through to iter_sites_adaptive.
+
+        Yields:
+            Site: Record of each site.
+
+        """
+        return iter_sites_adaptive(self.server_url, self.auth_token,
+                                   self.verify_ssl, self.session, page_size,
+                                   page_stats=page_stats, **kwargs)
+
+    def query_site(self, site_id: str) -> dict:
+        """Query the signed in site, including usage statistics.
+
+        Args:
+            site_id (str): Luid of the signed in site.
+
+        Returns:
+            dict: Site and usage attributes.
+
+        """
+        return api_query_site(self.server_url, self.auth_token, site_id,
+                              self.verify_ssl, self.session)
+
+    def sign_out(self):
+        """Sign out of the Tableau Server Site and forget the token.
+
+        The server session is left open while the token is still cached.
+
+        """
+        cached = None
+        if self.token_cache and self._credentials:
+            cached = self.token_cache.get(self.server_url, self.site_url_namespace,
+                                          self._credentials[1])
+
+        try:
+            if not cached or cached['token'] != self.auth_token:
+                api_sign_out(self.server_url, self.auth_token,
+                             self.site_url_namespace, self.verify_ssl,
+                             self.session)
+        finally:
+            self.auth_token = None
+            self.session.headers.pop('X-tableau-auth', None)
+
+
+def api_query_sites(server_url: str, auth_token: str, verify_ssl: str,
+                    concurrency: int = 1, session: object = None,
+                    page_size: int = DEFAULT_PAGE_SIZE) -> dict:
     """Query all the sites on a Tableau Server.
 
     Args:
         server_url (str): Tableau Server API URL.
         auth_token (str): REST API credentials token.
         verify_ssl (str): Path to HTTPS cert. False if HTTP Request will be sent.
+        concurrency (int): Maximum number of pages fetched at the same time.
+        session (object): Optional requests.Session used for connection reuse.
+        page_size (int): Number of sites requested per page.
 
     Returns:
           dict: Nested dictionary of Tableau Server Sites.
 
     """
-    page_size = 100
-    page_number = 1
-    total_returned = 0
-    sites = {}
+    return {site.name: site.to_dict()
+            for site in iter_sites(server_url, auth_token, verify_ssl,
+                                   concurrency, session, page_size)}
 
-    while True:
 
-        sites_url = (
-            f'{server_url}/sites/?pageSize={page_size}&pageNumber={page_number}'
-        )
+def api_query_sites_columns(server_url: str, auth_token: str, verify_ssl: str,
+                            concurrency: int = 1, session: object = None,
+                            page_size: int = DEFAULT_PAGE_SIZE) -> dict:
+    """Query all the sites on a Tableau Server into columns.
 
-        api_response = requests.get(sites_url,
-                                    headers={"X-tableau-auth": auth_token},
-                                    verify=verify_ssl)
+    Args:
+        server_url (str): Tableau Server API URL.
+        auth_token (str): REST API credentials token.
+        verify_ssl (str): Path to HTTPS cert. False if HTTP Request will be sent.
+        concurrency (int): Maximum number of pages fetched at the same time.
+        session (object): Optional requests.Session used for connection reuse.
+        page_size (int): Number of sites requested per page.
 
-        if api_response.status_code != 200:
-            error_code, summary, detail = format_error(
-                ET.fromstring(api_response.content))
-            raise Exception(
-                "Error querying Tableau Server Sites"
-                f"Error: {error_code}\nSummary: {summary}\nDetail: {detail}")
+    Returns:
+        dict: List of values for each of Name, Luid, Url Namespace and State.
 
-        else:
-            total_available = ET.fromstring(api_response.content).find(
-                './/t:pagination', namespaces=NAMESPACE).attrib['totalAvailable']
+    """
+    return sites_to_columns(iter_sites(server_url, auth_token, verify_ssl,
+                                       concurrency, session, page_size))
+
+
+def sites_to_columns(sites) -> dict:
+    """Convert Site records into one list per column.
+
+    Args:
+        sites (iterable): Site records.
+
+    Returns:
+        dict: List of values for each of Name, Luid, Url Namespace and State.
+
+    """
+    columns = {column: [] for column in SITE_COLUMNS}
+    appends = [columns[column].append for column in SITE_COLUMNS]
+
+    for site in sites:
+        for append, value in zip(appends, site):
+            append(value)
+
+    return columns
+
+
+def columns_to_dict(columns: dict) -> dict:
+    """Convert columnar sites back to the nested dictionary of sites.
+
+    Args:
+        columns (dict): List of values for each of Name, Luid, Url Namespace
+            and State.
+
+    Returns:
+        dict: Nested dictionary of Tableau Server Sites.
+
+    """
+    return {site.name: site.to_dict()
+            for site in map(Site, *(columns[column] for column in SITE_COLUMNS))}
+
+
+def iter_sites(server_url: str, auth_token: str, verify_ssl: str,
+               concurrency: int = 1, session: object = None,
+               page_size: int = DEFAULT_PAGE_SIZE):
+    """Stream the sites on a Tableau Server as each page arrives.
+
+    The first page is always fetched on its own to learn totalAvailable. When
+    concurrency is greater than 1 the remaining pages are then fetched by a
+    bounded thread pool, with at most concurrency pages in flight, and are
+    yielded in page order.
+
+    Args:
+        server_url (str): Tableau Server API URL.
+        auth_token (str): REST API credentials token.
+        verify_ssl (str): Path to HTTPS cert. False if HTTP Request will be sent.
+        concurrency (int): Maximum number of pages fetched at the same time.
+        session (object): Optional requests.Session used for connection reuse.
+        page_size (int): Number of sites requested per page.
+
+    Yields:
+        Site: Record of each site.
 
-            total_available = int(total_available)
+    """
+    if concurrency < 1:
+        raise ValueError(f'Concurrency must be at least 1, got {concurrency}')
+
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise ValueError(
+            f'Page size must be between 1 and {MAX_PAGE_SIZE}, got {page_size}')
+
+    total_available, site_records = api_query_sites_page(
+        server_url, auth_token, verify_ssl, page_size, 1, session)
+
+    yield from map(Site.from_attrib, site_records)
+
+    page_count = math.ceil(total_available / page_size)
+    page_numbers = range(2, page_count + 1)
+
+    if concurrency > 1 and len(page_numbers) > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = deque()
+
+            for page_number in page_numbers:
+                pending.append(executor.submit(
+                    api_query_sites_page, server_url, auth_token, verify_ssl,
+                    page_size, page_number, session))
+
+                if len(pending) >= concurrency:
+                    _, site_records = pending.popleft().result()
+                    yield from map(Site.from_attrib, site_records)
+
+            while pending:
+                _, site_records = pending.popleft().result()
+                yield from map(Site.from_attrib, site_records)
+
+    else:
+        for page_number in page_numbers:
+            _, site_records = api_query_sites_page(
+                server_url, auth_token, verify_ssl, page_size, page_number, session)
+            yield from map(Site.from_attrib, site_records)
+
+
+def iter_sites_adaptive(server_url: str, auth_token: str, verify_ssl: str,
+                        session: object = None, page_size: int = MAX_PAGE_SIZE,
+                        min_page_size: int = DEFAULT_PAGE_SIZE,
+                        slow_seconds: float = 5.0, page_stats: dict = None):
+    """Stream the sites on a Tableau Server with adaptive page sizing.
+
+    Pages are requested serially, starting at page_size. When a page fails or
+    takes longer than slow_seconds the page size is halved, down to
+    min_page_size, and a failed page is retried at the smaller size. Page
+    sizes are only ever halved so the sites already returned always line up
+    with a page boundary of the new size.
+
+    Args:
+        server_url (str): Tableau Server API URL.
+        auth_token (str): REST API credentials token.
+        verify_ssl (str): Path to HTTPS cert. False if HTTP Request will be sent.
+        session (object): Optional requests.Session used for connection reuse.
+        page_size (int): Number of sites requested on the first page.
+        min_page_size (int): Smallest page size backed off to.
+        slow_seconds (float): Response time above which the page size is halved.
+        page_stats (dict): Optional dict updated with the chosen page_size and
+            the number of requests made.
+
+    Yields:
+        Site: Record of each site.
+
+    """
+    if not 1 <= min_page_size <= page_size <= MAX_PAGE_SIZE:
+        raise ValueError(
+            f'Page sizes must satisfy 1 <= {min_page_size} <= {page_size} '
+            f'<= {MAX_PAGE_SIZE}')
+
+    if page_stats is None:
+        page_stats = {}
+
+    page_stats.update(page_size=page_size, requests=0)
+    returned = 0
+    total_available = None
+
+    while total_available is None or returned < total_available:
+
+        can_back_off = page_size % 2 == 0 and page_size // 2 >= min_page_size
+        page_number = returned // page_size + 1
+        page_stats['requests'] += 1
+        start = time.perf_counter()
+
+        try:
+            total_available, site_records = api_query_sites_page(
+                server_url, auth_token, verify_ssl, page_size, page_number, session)
+
+        except Exception:
+            if not can_back_off:
+                raise
+
+            page_size //= 2
+            page_stats['page_size'] = page_size
+            continue
+
+        if time.perf_counter() - start > slow_seconds and can_back_off:
+            page_size //= 2
+            page_stats['page_size'] = page_size
+
+        page_start = returned
+
+        for site_record in site_records:
+            returned += 1
+            yield Site.from_attrib(site_record)
+
+        if returned == page_start:
+            break
+
+
+def fan_out_sites(server_url: str, verify_ssl: str, auth_method: str,
+                  auth_value: str, auth_secret: str, sites, site_query,
+                  workers: int = 4, token_cache: TokenCache = None,
+                  **client_options):
+    """Sign in to many sites concurrently and run a query on each.
+
+    Each site gets its own TableauRestClient signed in to that site. At most
+    workers sites are in progress at once and results are yielded in the
+    order of sites. A failing site is reported in its SiteResult rather than
+    stopping the other sites.
+
+    Args:
+        server_url (str): Tableau Server API URL.
+        verify_ssl (str): Path to HTTPS cert. False if HTTP Request will be sent.
+        auth_method (str): Token or Classic.
+        auth_value (str): Name of the Token or User.
+        auth_secret (str): Token Value or Password.
+        sites (iterable): Site records, e.g. from iter_sites.
+        site_query (callable): Called with the signed in client and the Site,
+            its return value is the SiteResult result.
+        workers (int): Maximum number of sites queried at the same time.
+        token_cache (TokenCache): Optional on-disk cache of auth tokens.
+        **client_options: Passed through to each TableauRestClient, e.g. a
+            shared rate_limiter and request_stats.
+
+    Yields:
+        SiteResult: Result, elapsed seconds and error of each site.
+
+    """
+    if workers < 1:
+        raise ValueError(f'Workers must be at least 1, got {workers}')
+
+    def run_site_query(site: Site) -> SiteResult:
+        start = time.perf_counter()
+
+        try:
+            with TableauRestClient(server_url, verify_ssl, pool_size=1,
+                                   token_cache=token_cache,
+                                   **client_options) as site_client:
+                site_client.sign_in(auth_method, auth_value, auth_secret,
+                                    site.url_namespace)
+                result = site_query(site_client, site)
+
+        except Exception as e:
+            return SiteResult(site, None, time.perf_counter() - start, str(e))
+
+        return SiteResult(site, result, time.perf_counter() - start, None)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+
+        for site in sites:
+            pending.append(executor.submit(run_site_query, site))
 
-            page_number += 1
-            total_returned += page_size
+            if len(pending) >= workers:
+                yield pending.popleft().result()
 
-            site_elements = ET.fromstring(api_response.content).findall(
-                './/t:site', namespaces=NAMESPACE)
+        while pending:
+            yield pending.popleft().result()
 
-            for site in site_elements:
 
-                sites[site.attrib['name']] = {}
-                sites[site.attrib['name']]['Name'] = site.attrib['name']
-                sites[site.attrib['name']]['Luid'] = site.attrib['id']
-                sites[site.attrib['name']]['Url Namespace'] = site.attrib['contentUrl']
-                sites[site.attrib['name']]['State'] = site.attrib['state']
+def api_query_site(server_url: str, auth_token: str, site_id: str,
+                   verify_ssl: str, session: object = None) -> dict:
+    """Query a single site, including its usage statistics.
 
-            if total_returned >= total_available:
-                break
+    Args:
+        server_url (str): Tableau Server API URL.
+        auth_token (str): REST API credentials token for the site.
+        site_id (str): Luid of the site.
+        verify_ssl (str): Path to HTTPS cert. False if HTTP Request will be sent.
+        session (object): Optional requests.Session used for connection reuse.
+
+    Returns:
+        dict: Site and usage attributes.
+
+    """
+    site_url = f'{server_url}/sites/{site_id}?includeUsageStatistics=true'
+
+    http = session or requests
+
+    api_response = http.get(site_url,
+                            headers={"X-tableau-auth": auth_token},
+                            verify=verify_ssl)
+
+    if api_response.status_code != 200:
+        error_code, summary, detail = format_error(
+            ET.fromstring(api_response.content))
+        raise Exception(
+            f"Error querying site '{site_id}'\n"
+            f"Error: {error_code}\nSummary: {summary}\nDetail: {detail}")
+
+    site_element = ET.fromstring(api_response.content).find(
+        './/t:site', namespaces=NAMESPACE)
+    usage_element = site_element.find('.//t:usage', namespaces=NAMESPACE)
+
+    site = dict(site_element.attrib)
+    if usage_element is not None:
+        site.update(usage_element.attrib)
+
+    return site
+
+
+def api_query_sites_page(server_url: str, auth_token: str, verify_ssl: str,
+                         page_size: int, page_number: int,
+                         session: object = None) -> tuple:
+    """Query a single page of sites on a Tableau Server.
+
+    Args:
+        server_url (str): Tableau Server API URL.
+        auth_token (str): REST API credentials token.
+        verify_ssl (str): Path to HTTPS cert. False if HTTP Request will be sent.
+        page_size (int): Number of sites returned per page.
+        page_number (int): Page to return, starting at 1.
+        session (object): Optional requests.Session used for connection reuse.
 
-    return sites
+    Returns:
+        tuple: Total Available Sites, iterator of site attribute dicts on the
+            page, parsed as it is consumed
+
+    """
+    sites_url = (
+        f'{server_url}/sites/?pageSize={page_size}&pageNumber={page_number}'
+    )
+
+    http = session or requests
+
+    api_response = http.get(sites_url,
+                            headers={"X-tableau-auth": auth_token},
+                            verify=verify_ssl)
+
+    if api_response.status_code != 200:
+        error_code, summary, detail = format_error(
+            ET.fromstring(api_response.content))
+        raise Exception(
+            "Error querying Tableau Server Sites"
+            f"Error: {error_code}\nSummary: {summary}\nDetail: {detail}")
+
+    pagination = {}
+    site_records = iter_parse_sites(api_response.content, pagination)
+
+    # t:pagination closes before t:sites, so totalAvailable is known once the
+    # first site is parsed and the rest of the page is parsed lazily.
+    first_record = next(site_records, None)
+
+    if first_record is not None:
+        site_records = itertools.chain([first_record], site_records)
+
+    return int(pagination['totalAvailable']), site_records
+
+
+def iter_parse_sites(content: bytes, pagination: dict = None):
+    """Incrementally parse a Query Sites response body.
+
+    Each site is yielded as soon as its t:site element closes and the element
+    is then cleared, so the parse tree never holds more than one site. Peak
+    memory only stays flat with page size if the caller does not keep the
+    sites it is given.
+
+    Args:
+        content (bytes): Response body of a Query Sites API call.
+        pagination (dict): Optional dict updated with the t:pagination
+            attributes once that element is parsed.
+
+    Yields:
+        dict: Attributes of each t:site element.
+
+    """
+    sites_element = None
+
+    for event, element in ET.iterparse(io.BytesIO(content),
+                                       events=('start', 'end')):
+
+        if event == 'start':
+            if element.tag == SITES_TAG:
+                sites_element = element
+
+        elif element.tag == SITE_TAG:
+            yield dict(element.attrib)
+
+            element.clear()
+            if sites_element is not None:
+                sites_element.remove(element)
+
+        elif element.tag == PAGINATION_TAG and pagination is not None:
+            pagination.update(element.attrib)
 
 
 def api_sign_in(server_url: str, auth_method: str, auth_value, auth_secret: str,
-                site_url_namespace: str, verify_ssl: str) -> str:
+                site_url_namespace: str, verify_ssl: str,
+                session: object = None) -> str:
     """Authenticate with a Site on the Tableau Server.
 
     Args:
@@ -128,6 +850,7 @@ def api_sign_in(server_url: str, auth_method: str, auth_value, auth_secret: str,
         site_url_namespace (str): Tableau Server Site name as it appears in
             the URL.
         verify_ssl (str): Path to HTTPS cert. False if HTTP Request will be sent.
+        session (object): Optional requests.Session used for connection reuse.
 
     Returns:
         str: Token used for API authentication.
@@ -154,9 +877,11 @@ def api_sign_in(server_url: str, auth_method: str, auth_value, auth_secret: str,
     ET.SubElement(credentials_element, 'site', contentUrl=site_url_namespace)
     api_request = ET.tostring(api_request)
 
-    api_response = requests.post(sign_in_url,
-                                 data=api_request,
-                                 verify=verify_ssl)
+    http = session or requests
+
+    api_response = http.post(sign_in_url,
+                             data=api_request,
+                             verify=verify_ssl)
 
     if api_response.status_code != 200:
         error_code, summary, detail = format_error(
@@ -173,7 +898,7 @@ def api_sign_in(server_url: str, auth_method: str, auth_value, auth_secret: str,
 
 
 def api_sign_out(server_url: str, auth_token: str, site_url_namespace: str,
-                 verify_ssl: str):
+                 verify_ssl: str, session: object = None):
     """Sign out of the Tableau Server Site.
 
     Args:
@@ -182,13 +907,16 @@ def api_sign_out(server_url: str, auth_token: str, site_url_namespace: str,
         site_url_namespace (str): Tableau Server Site name as it appears
             in the URL.
         verify_ssl (str): Path to HTTPS cert. False if HTTP Request will be sent.
+        session (object): Optional requests.Session used for connection reuse.
 
     """
     sign_out_url = f"{server_url}/auth/signout"
 
-    api_response = requests.post(sign_out_url,
-                                 headers={'x-tableau-auth': auth_token},
-                                 verify=verify_ssl)
+    http = session or requests
+
+    api_response = http.post(sign_out_url,
+                             headers={'x-tableau-auth': auth_token},
+                             verify=verify_ssl)
 
     if api_response.status_code != 204:
         error_code, summary, detail = format_error(
@@ -0,0 +1,199 @@
+import json
+import math
+import random
+import re
+import threading
+import time
+
+from urllib.parse import urlparse
+
+import requests
+
+RETRY_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+LUID_PATTERN = re.compile(
+    r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+API_PREFIX_PATTERN = re.compile(r'^.*?/api/[^/]+')
+
+
+class RateLimiter:
+    """Thread-safe token bucket limiting how fast requests are sent.
+
+    Args:
+        rate (float): Requests allowed per second on average.
+        burst (int): Requests that may be sent back to back after idling.
+
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError(f'Rate must be positive, got {rate}')
+
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst,
+                               self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+
+        if wait:
+            time.sleep(wait)
+
+
+class RequestStats:
+    """Thread-safe per-endpoint request count, latency, bytes and retries."""
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def endpoint(method: str, url: str) -> str:
+        """Normalize a request into an endpoint name.
+
+        The API version prefix and query string are dropped and luids are
+        replaced with {id}, e.g. 'GET /sites/{id}'.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+
+        Returns:
+            str: Endpoint name.
+
+        """
+        path = API_PREFIX_PATTERN.sub('', urlparse(url).path)
+        return f"{method} {LUID_PATTERN.sub('{id}', path)}"
+
+    def record(self, endpoint: str, seconds: float, size: int, retries: int):
+        with self._lock:
+            stats = self._endpoints.setdefault(
+                endpoint, {'latencies': [], 'bytes': 0, 'retries': 0})
+            stats['latencies'].append(seconds)
+            stats['bytes'] += size
+            stats['retries'] += retries
+
+    def summary(self) -> dict:
+        """Summarize the recorded requests.
+
+        Returns:
+            dict: count, p50 and p95 latency in seconds, bytes and retries
+                keyed by endpoint.
+
+        """
+        with self._lock:
+            endpoints = {endpoint: dict(stats, latencies=sorted(stats['latencies']))
+                         for endpoint, stats in self._endpoints.items()}
+
+        return {
+            endpoint: {
+                'count': len(stats['latencies']),
+                'p50': percentile(stats['latencies'], 50),
+                'p95': percentile(stats['latencies'], 95),
+                'bytes': stats['bytes'],
+                'retries': stats['retries'],
+            }
+            for endpoint, stats in endpoints.items()
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.summary(), indent=2, sort_keys=True)
+
+
+class ResilientSession(requests.Session):
+    """requests.Session with rate limiting, retries and request timing.
+
+    Every request waits on the optional rate limiter. Connection errors,
+    timeouts and 429/5xx responses are retried up to max_retries times with
+    full-jitter exponential backoff, honouring a numeric Retry-After header.
+    Each request's latency, response bytes and retries are recorded in stats.
+
+    Args:
+        rate_limiter (RateLimiter): Optional limiter shared between sessions.
+        max_retries (int): Retries after the first attempt.
+        backoff (float): Base backoff in seconds, doubled on every retry.
+        max_backoff (float): Longest single backoff in seconds.
+        stats (RequestStats): Optional stats shared between sessions.
+
+    """
+
+    def __init__(self, rate_limiter: RateLimiter = None, max_retries: int = 3,
+                 backoff: float = 0.5, max_backoff: float = 30.0,
+                 stats: RequestStats = None):
+        super().__init__()
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stats = stats
+
+    def send(self, request: object, **kwargs) -> object:
+        endpoint = RequestStats.endpoint(request.method, request.url)
+        start = time.perf_counter()
+        retries = 0
+
+        while True:
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+
+            try:
+                response = super().send(request, **kwargs)
+
+            except (requests.ConnectionError, requests.Timeout):
+                if retries >= self.max_retries:
+                    self._record(endpoint, start, 0, retries)
+                    raise
+
+                retries += 1
+                time.sleep(self._backoff_seconds(retries, None))
+                continue
+
+            if (response.status_code in RETRY_STATUS_CODES
+                    and retries < self.max_retries):
+                retries += 1
+                time.sleep(self._backoff_seconds(
+                    retries, response.headers.get('Retry-After')))
+                response.close()
+                continue
+
+            self._record(endpoint, start, len(response.content), retries)
+
+            return response
+
+    def _backoff_seconds(self, retries: int, retry_after: str) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+
+        return random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** (retries - 1)))
+
+    def _record(self, endpoint: str, start: float, size: int, retries: int):
+        if self.stats:
+            self.stats.record(endpoint, time.perf_counter() - start, size, retries)
+
+
+def percentile(values: list, percent: float) -> float:
+    """Nearest-rank percentile of sorted values.
+
+    Args:
+        values (list): Sorted values.
+        percent (float): Percentile between 0 and 100.
+
+    Returns:
+        float: Percentile value, or None if there are no values.
+
+    """
+    if not values:
+        return None
+
+    rank = max(math.ceil(percent / 100 * len(values)) - 1, 0)
+
+    return values[rank]
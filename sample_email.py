@@ -1,11 +1,26 @@
 
 import argparse
+import asyncio
+import csv
 import getpass
+import html
+import json
+import re
 import smtplib
+import sys
+import threading
+import time
+import uuid
 
+from concurrent.futures import ThreadPoolExecutor
+from email import quoprimime
+from email.policy import compat32
+from email.header import Header
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
+from rest_session import percentile
+
 
 HTML_BODY = """
 <!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Strict//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-strict.dtd">
@@ -194,6 +209,10 @@ HTML_BODY = """
 </html>
 """
 
+SUBJECT = "Tableau DataDev Day 2021 Test Email"
+TEMPLATE_FIELD = re.compile(r'\$\{(\w+)\}')
+SMTP_POLICY = compat32.clone(linesep='\r\n')
+
 
 def main():
 
@@ -202,21 +221,68 @@ def main():
     parser.add_argument('--port', '-p', required=False, default=25, help='smtp server port')
     parser.add_argument('--user', '-u', required=False, help='user for smtp authentication')
     parser.add_argument('--sender', '-e', required=True, help='email address of sender (FROM)')
-    parser.add_argument('--recipient', '-r', required=True, help='email address of recipient (TO)')
+    parser.add_argument('--recipient', '-r', required=False, help='email address of recipient (TO)')
+    parser.add_argument('--recipients', required=False,
+                        help='CSV or JSONL file of recipients with an email column for bulk sends')
+    parser.add_argument('--connections', type=int, default=4, required=False,
+                        help='number of parallel smtp connections for bulk sends')
+    parser.add_argument('--max_messages', type=int, default=100, required=False,
+                        help='messages sent on a connection before it is reopened')
+    parser.add_argument('--dispatch', action='store_true',
+                        help='send bulk messages with the asyncio dispatcher')
+    parser.add_argument('--queue_size', type=int, default=100, required=False,
+                        help='recipients buffered ahead of the dispatcher workers')
+    parser.add_argument('--max_retries', type=int, default=3, required=False,
+                        help='retries of a recipient after a 4xx response')
+    parser.add_argument('--template', action='store_true',
+                        help='build bulk messages from a pre-encoded template, '
+                             'substituting ${field} recipient columns into the body')
 
     args = parser.parse_args()
     password = None
 
+    if not args.recipient and not args.recipients:
+        raise ValueError('Either recipient or recipients must be defined in command line')
+
     if args.user:
         password = getpass.getpass(f'{args.user} Password: ')
 
-    msg = MIMEMultipart('related')
-    msg['Subject'] = "Tableau DataDev Day 2021 Test Email"
-    msg['From'] = args.sender
-    msg['To'] = args.recipient
+    if args.recipients:
+        build_times = []
+        recipients = load_recipients(args.recipients)
 
-    email_body = MIMEText(HTML_BODY, 'html')
-    msg.attach(email_body)
+        if args.template:
+            build = MessageTemplate(HTML_BODY).render
+        else:
+            build = build_message_bytes
+
+        if args.dispatch:
+            stats = asyncio.run(dispatch(
+                args.server, args.port, args.user, password, args.sender,
+                recipients, build, args.connections, args.queue_size,
+                args.max_messages, args.max_retries))
+
+            for recipient, code, error in stats.permanent_failures:
+                print(f'{recipient}: {code} {error}', file=sys.stderr)
+
+            print(json.dumps(stats.summary(), indent=2))
+            return
+
+        sent, failures = send_bulk(
+            args.server, args.port, args.user, password, args.sender, recipients,
+            args.connections, args.max_messages, build, build_times)
+
+        for recipient, error in failures:
+            print(f'{recipient}: {error}')
+
+        print(f'Sent {sent} messages with {len(failures)} failures')
+
+        if build_times:
+            print(f'Message build time: {sum(build_times) / len(build_times) * 1e6:.0f}us '
+                  f'mean, {max(build_times) * 1e6:.0f}us max')
+        return
+
+    msg = build_message(args.sender, args.recipient)
 
     smtp = smtplib.SMTP(args.server, args.port)
 
@@ -231,5 +297,467 @@ def main():
         smtp.quit()
 
 
+def build_message(sender: str, recipient: str) -> MIMEMultipart:
+    """Build the DataDev Day HTML email.
+
+    Args:
+        sender (str): Email address of sender (FROM).
+        recipient (str): Email address of recipient (TO).
+
+    Returns:
+        MIMEMultipart: Email message.
+
+    """
+    msg = MIMEMultipart('related')
+    msg['Subject'] = SUBJECT
+    msg['From'] = sender
+    msg['To'] = recipient
+
+    email_body = MIMEText(HTML_BODY, 'html')
+    msg.attach(email_body)
+
+    return msg
+
+
+def build_message_bytes(sender: str, recipient: dict) -> bytes:
+    """Build and serialize the DataDev Day HTML email for one recipient.
+
+    Args:
+        sender (str): Email address of sender (FROM).
+        recipient (dict): Recipient fields, including email.
+
+    Returns:
+        bytes: Serialized email message.
+
+    """
+    return build_message(sender, recipient['email']).as_bytes(policy=SMTP_POLICY)
+
+
+class MessageTemplate:
+    """Pre-encoded HTML email for mass personalization.
+
+    The MIME structure and the quoted-printable encoding of the static body
+    are produced once. Rendering only escapes and encodes the ${field}
+    values and the Subject, From and To headers, then joins the pre-encoded
+    pieces, so the per-message cost no longer grows with the body size.
+    Encoded segments are joined with soft line breaks so every line stays
+    within the quoted-printable limit, and lines end in CRLF as sent over
+    SMTP.
+
+    Args:
+        html_body (str): HTML body, optionally containing ${field} markers
+            filled from recipient fields.
+        subject (str): Subject header, optionally containing ${field} markers.
+
+    """
+
+    def __init__(self, html_body: str = HTML_BODY, subject: str = SUBJECT):
+        self.subject = subject
+        self.boundary = f'==============={uuid.uuid4().hex}=='
+
+        parts = TEMPLATE_FIELD.split(html_body)
+        self.static_segments = [encode_quoted_printable(part) for part in parts[::2]]
+        self.fields = parts[1::2]
+
+        self.prefix = (
+            f'Content-Type: multipart/related; boundary="{self.boundary}"\r\n'
+            'MIME-Version: 1.0\r\n'
+        ).encode()
+        self.body_prefix = (
+            f'\r\n--{self.boundary}\r\n'
+            'Content-Type: text/html; charset="utf-8"\r\n'
+            'MIME-Version: 1.0\r\n'
+            'Content-Transfer-Encoding: quoted-printable\r\n\r\n'
+        ).encode()
+        self.suffix = f'\r\n--{self.boundary}--\r\n'.encode()
+
+    def render(self, sender: str, recipient: dict) -> bytes:
+        """Render the message for one recipient.
+
+        Args:
+            sender (str): Email address of sender (FROM).
+            recipient (dict): Recipient fields, including email.
+
+        Returns:
+            bytes: Serialized email message.
+
+        """
+        subject = TEMPLATE_FIELD.sub(lambda match: str(recipient.get(match[1], '')),
+                                     self.subject)
+        pieces = [
+            self.prefix,
+            encode_header('Subject', subject),
+            encode_header('From', sender),
+            encode_header('To', recipient['email']),
+            self.body_prefix,
+            self.static_segments[0],
+        ]
+
+        for field, segment in zip(self.fields, self.static_segments[1:]):
+            pieces.append(b'=\r\n')
+            pieces.append(encode_quoted_printable(
+                html.escape(str(recipient.get(field, '')))))
+            pieces.append(b'=\r\n')
+            pieces.append(segment)
+
+        pieces.append(self.suffix)
+
+        return b''.join(pieces)
+
+
+def encode_quoted_printable(text: str) -> bytes:
+    return quoprimime.body_encode(text.encode().decode('latin-1'),
+                                  eol='\r\n').encode('ascii')
+
+
+def encode_header(name: str, value: str) -> bytes:
+    value = ' '.join(value.splitlines())
+
+    if not value.isascii():
+        value = Header(value, 'utf-8').encode(linesep='\r\n')
+
+    return f'{name}: {value}\r\n'.encode('ascii')
+
+
+def load_recipients(path: str):
+    """Stream recipients from a CSV file with a header row or a JSONL file.
+
+    Args:
+        path (str): Path of a .csv or .jsonl file with an email field per
+            recipient.
+
+    Yields:
+        dict: Fields of each recipient.
+
+    """
+    with open(path, newline='') as recipients_file:
+
+        if path.lower().endswith(('.jsonl', '.json')):
+            for line in recipients_file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(recipients_file)
+
+
+class SMTPConnection:
+    """Authenticated SMTP connection reused across many messages.
+
+    The connection is opened on first use, reopened after max_messages
+    messages to respect server-side per-session limits, and reopened
+    transparently if the server drops it between messages.
+
+    Args:
+        server (str): SMTP server.
+        port (int): SMTP server port.
+        user (str): User for SMTP authentication, or None.
+        password (str): Password for SMTP authentication.
+        max_messages (int): Messages sent before the connection is reopened.
+
+    """
+
+    def __init__(self, server: str, port: int, user: str = None,
+                 password: str = None, max_messages: int = 100):
+        self.server = server
+        self.port = port
+        self.user = user
+        self.password = password
+        self.max_messages = max_messages
+        self.smtp = None
+        self.sent = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def connect(self):
+        self.close()
+        self.smtp = smtplib.SMTP(self.server, self.port)
+
+        if self.user:
+            try:
+                self.smtp.login(self.user, self.password)
+            except BaseException:
+                # Never leave an unauthenticated connection for the next
+                # message to send over.
+                self.close()
+                raise
+
+    def close(self):
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                self.smtp.close()
+
+        self.smtp = None
+        self.sent = 0
+
+    def sendmail(self, sender: str, recipient: str, message: bytes):
+        """Send one message, reconnecting first if needed.
+
+        Args:
+            sender (str): Email address of sender (FROM).
+            recipient (str): Email address of recipient (TO).
+            message (bytes): Serialized email message.
+
+        """
+        if self.smtp is None or self.sent >= self.max_messages:
+            self.connect()
+
+        try:
+            self.smtp.sendmail(sender, recipient, message)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            self.connect()
+            self.smtp.sendmail(sender, recipient, message)
+
+        self.sent += 1
+
+
+def send_bulk(server: str, port: int, user: str, password: str, sender: str,
+              recipients, connections: int = 4, max_messages: int = 100,
+              build=build_message_bytes, build_times: list = None) -> tuple:
+    """Send the email to many recipients over a small pool of connections.
+
+    Each of the connections worker threads owns one SMTPConnection and takes
+    recipients from a shared iterator, so recipients are never all loaded
+    into memory.
+
+    Args:
+        server (str): SMTP server.
+        port (int): SMTP server port.
+        user (str): User for SMTP authentication, or None.
+        password (str): Password for SMTP authentication.
+        sender (str): Email address of sender (FROM).
+        recipients (iterable): Recipient fields, including email.
+        connections (int): Number of parallel SMTP connections.
+        max_messages (int): Messages sent on a connection before it is
+            reopened.
+        build (callable): Builds the serialized message from sender and
+            recipient, e.g. MessageTemplate.render.
+        build_times (list): Optional list each message's build seconds are
+            appended to.
+
+    Returns:
+        tuple: Number of messages sent, list of (recipient email, error) failures
+
+    """
+    if connections < 1:
+        raise ValueError(f'Connections must be at least 1, got {connections}')
+
+    recipients = iter(recipients)
+    recipients_lock = threading.Lock()
+    failures = []
+    sent = [0] * connections
+
+    def send_worker(worker: int):
+        with SMTPConnection(server, port, user, password, max_messages) as smtp:
+
+            while True:
+                with recipients_lock:
+                    recipient = next(recipients, None)
+
+                if recipient is None:
+                    return
+
+                try:
+                    start = time.perf_counter()
+                    message = build(sender, recipient)
+
+                    if build_times is not None:
+                        build_times.append(time.perf_counter() - start)
+
+                    smtp.sendmail(sender, recipient['email'], message)
+                    sent[worker] += 1
+                except Exception as e:
+                    # A bad recipient row is a failure, as in dispatch, not
+                    # the end of the send.
+                    failures.append((recipient.get('email'), str(e)))
+
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        for future in [executor.submit(send_worker, worker)
+                       for worker in range(connections)]:
+            future.result()
+
+    return sum(sent), failures
+
+
+class DispatchStats:
+    """Delivery metrics collected by dispatch."""
+
+    def __init__(self):
+        self.sent = 0
+        self.retries = 0
+        self.temporary_failures = 0
+        self.permanent_failures = []
+        self.latencies = []
+        self.build_times = []
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def summary(self) -> dict:
+        """Summarize throughput, latency percentiles, message build time and
+        failure counts.
+
+        Returns:
+            dict: Delivery metrics; latencies and build times are in seconds.
+
+        """
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        latencies = sorted(self.latencies)
+        build_times = self.build_times
+
+        return {
+            'sent': self.sent,
+            'seconds': elapsed,
+            'messages_per_second': self.sent / elapsed if elapsed else None,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'build_mean': sum(build_times) / len(build_times) if build_times else None,
+            'build_max': max(build_times, default=None),
+            'retries': self.retries,
+            'temporary_failures': self.temporary_failures,
+            'permanent_failures': len(self.permanent_failures),
+        }
+
+
+async def dispatch(server: str, port: int, user: str, password: str, sender: str,
+                   recipients, build=build_message_bytes, concurrency: int = 4,
+                   queue_size: int = 100, max_messages: int = 100,
+                   max_retries: int = 3, retry_delay: float = 1.0) -> DispatchStats:
+    """Send the email to many recipients with asyncio workers.
+
+    Recipients are fed through a bounded queue, so reading them applies
+    backpressure instead of running ahead of delivery. Each of the
+    concurrency workers owns one SMTPConnection and runs the blocking SMTP
+    calls, including closing the connection, on its own thread of a pool
+    sized to concurrency, so one slow server response only stalls its own
+    worker. 4xx responses and dropped connections are retried for that
+    recipient with exponential backoff. 5xx responses are permanent failures
+    and are not retried.
+
+    Args:
+        server (str): SMTP server.
+        port (int): SMTP server port.
+        user (str): User for SMTP authentication, or None.
+        password (str): Password for SMTP authentication.
+        sender (str): Email address of sender (FROM).
+        recipients (iterable): Recipient fields, including email.
+        build (callable): Builds the serialized message from sender and
+            recipient, e.g. MessageTemplate.render.
+        concurrency (int): Number of workers and SMTP connections.
+        queue_size (int): Recipients buffered ahead of the workers.
+        max_messages (int): Messages sent on a connection before it is
+            reopened.
+        max_retries (int): Retries of a recipient after a 4xx response.
+        retry_delay (float): Seconds before the first retry, doubled after
+            every retry.
+
+    Returns:
+        DispatchStats: Delivery metrics and permanent failures.
+
+    """
+    if concurrency < 1:
+        raise ValueError(f'Concurrency must be at least 1, got {concurrency}')
+
+    stats = DispatchStats()
+    pending = asyncio.Queue(maxsize=queue_size)
+    loop = asyncio.get_running_loop()
+    # The default executor is capped at min(32, cpus + 4) threads.
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def blocking(function, *args):
+        return loop.run_in_executor(executor, function, *args)
+
+    async def send_worker():
+        smtp = SMTPConnection(server, port, user, password, max_messages)
+
+        try:
+            while True:
+                recipient = await pending.get()
+
+                if recipient is None:
+                    return
+
+                try:
+                    await deliver(smtp, recipient)
+                except Exception as e:
+                    stats.permanent_failures.append(
+                        (recipient.get('email'), None, str(e)))
+        finally:
+            await blocking(smtp.close)
+
+    async def deliver(smtp: SMTPConnection, recipient: dict):
+        start = time.perf_counter()
+        message = build(sender, recipient)
+        stats.build_times.append(time.perf_counter() - start)
+
+        for attempt in range(max_retries + 1):
+            try:
+                await blocking(smtp.sendmail, sender, recipient['email'], message)
+
+            except (smtplib.SMTPException, OSError) as e:
+                code = smtp_error_code(e)
+
+                if code is not None and code >= 500:
+                    stats.permanent_failures.append((recipient['email'], code, str(e)))
+                    return
+
+                if attempt == max_retries:
+                    stats.temporary_failures += 1
+                    stats.permanent_failures.append((recipient['email'], code, str(e)))
+                    return
+
+                stats.temporary_failures += 1
+                stats.retries += 1
+                await blocking(smtp.close)
+                await asyncio.sleep(retry_delay * 2 ** attempt)
+                continue
+
+            stats.sent += 1
+            stats.latencies.append(time.perf_counter() - start)
+            return
+
+    workers = [asyncio.create_task(send_worker()) for _ in range(concurrency)]
+
+    try:
+        for recipient in recipients:
+            await pending.put(recipient)
+
+        for _ in workers:
+            await pending.put(None)
+
+        await asyncio.gather(*workers)
+
+    finally:
+        for worker in workers:
+            worker.cancel()
+
+        await asyncio.gather(*workers, return_exceptions=True)
+        executor.shutdown(wait=False)
+        stats.finished = time.perf_counter()
+
+    return stats
+
+
+def smtp_error_code(error: Exception) -> int:
+    """Find the SMTP reply code of a failed send.
+
+    Args:
+        error (Exception): Error raised by smtplib.
+
+    Returns:
+        int: SMTP reply code, or None for connection errors.
+
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return min(code for code, _ in error.recipients.values())
+
+    return getattr(error, 'smtp_code', None)
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,108 @@
+import sqlite3
+
+from typing import NamedTuple
+
+
+class SiteChange(NamedTuple):
+    """A site added, removed or changed since the previous snapshot."""
+
+    change: str
+    site: tuple
+    previous: tuple
+
+
+class SiteSnapshot:
+    """Local SQLite snapshot of a site inventory keyed by site Luid.
+
+    Sites are stored as (name, luid, url_namespace, state) rows. Only the
+    delta between runs is written back, so an unchanged inventory costs a
+    single read of the snapshot.
+
+    Args:
+        path (str): Path of the SQLite database file.
+
+    """
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS sites ('
+            'luid TEXT PRIMARY KEY, name TEXT, url_namespace TEXT, state TEXT)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def load(self, record=tuple) -> dict:
+        """Load the snapshot.
+
+        Args:
+            record (callable): Builds a site record from a
+                (name, luid, url_namespace, state) tuple, e.g. Site._make.
+
+        Returns:
+            dict: Site records keyed by Luid.
+
+        """
+        rows = self.connection.execute(
+            'SELECT name, luid, url_namespace, state FROM sites')
+
+        return {row[1]: record(row) for row in rows}
+
+    def apply(self, changes) -> list:
+        """Write site changes to the snapshot in a single transaction.
+
+        Args:
+            changes (iterable): SiteChange records, e.g. from diff_sites.
+
+        Returns:
+            list: The changes that were applied.
+
+        """
+        changes = list(changes)
+
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO sites (name, luid, url_namespace, state) '
+                'VALUES (?, ?, ?, ?)',
+                (tuple(change.site) for change in changes
+                 if change.change != 'removed'))
+
+            self.connection.executemany(
+                'DELETE FROM sites WHERE luid = ?',
+                ((change.site[1],) for change in changes
+                 if change.change == 'removed'))
+
+        return changes
+
+
+def diff_sites(previous: dict, sites):
+    """Compare a stream of sites against the previous snapshot.
+
+    Added and changed sites are yielded as they stream in; removed sites are
+    yielded once the stream is exhausted. previous is consumed in the process.
+
+    Args:
+        previous (dict): Site records keyed by Luid, from SiteSnapshot.load.
+        sites (iterable): Current (name, luid, url_namespace, state) records.
+
+    Yields:
+        SiteChange: Each added, changed or removed site.
+
+    """
+    for site in sites:
+        previous_site = previous.pop(site[1], None)
+
+        if previous_site is None:
+            yield SiteChange('added', site, None)
+
+        elif previous_site != site:
+            yield SiteChange('changed', site, previous_site)
+
+    for previous_site in previous.values():
+        yield SiteChange('removed', previous_site, None)
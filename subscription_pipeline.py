@@ -0,0 +1,545 @@
+import argparse
+import getpass
+import html
+import json
+import queue
+import smtplib
+import sys
+import threading
+import time
+
+import tableauserverclient as TSC
+
+from query_metadata import (DEFAULT_PAGE_SIZE, aggregate_workbooks,
+                            build_workbooks_query, iter_workbook_nodes, signed_in)
+from query_sites import TableauRestClient
+from sample_email import HTML_BODY, MessageTemplate, SMTPConnection, load_recipients
+
+REPORT_FIELDS = ('name', 'id', 'sheetCount', 'dashboardCount')
+REPORT_ROWS = 50
+REPORT_SUBJECT = 'Tableau inventory of {site}'
+REPORT_ROW = (
+    '<tr><td style="font-size:14px;font-family: Benton Sans, sans-serif;'
+    'color:#666666;padding-top:5px;">{name}</td>'
+    '<td align="right" style="font-size:14px;font-family: Benton Sans, sans-serif;'
+    'color:#666666;padding-top:5px;">{sheets}</td>'
+    '<td align="right" style="font-size:14px;font-family: Benton Sans, sans-serif;'
+    'color:#666666;padding-top:5px;">{dashboards}</td></tr>'
+)
+REPORT_TABLE = (
+    'Prepared for ${{email}}'
+    '<table border="0" cellpadding="0" cellspacing="0" width="100%" '
+    'style="border-collapse:collapse !important;margin-top:20px;">'
+    '<tr><th align="left">Workbook</th><th align="right">Sheets</th>'
+    '<th align="right">Dashboards</th></tr>{rows}</table>{more}'
+)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Email each subscriber a summary of their Tableau site's workbooks")
+    parser.add_argument('--server', '-s', required=True, help='tableau server url')
+    parser.add_argument('--version', '-v', required=True, help='tableau server api version')
+    parser.add_argument('--username', '-u', required=True, help='username of tableau server user')
+    parser.add_argument('--password', '-p', required=False, help='password of tableau server user')
+    parser.add_argument('--https_cert', '-c', required=False, help='path to HTTPS cert')
+    parser.add_argument('--recipients', '-r', required=True,
+                        help='CSV or JSONL file of recipients with email and site columns; '
+                             'site is the url namespace of the site they subscribe to')
+    parser.add_argument('--smtp_server', required=True, help='smtp server')
+    parser.add_argument('--smtp_port', type=int, default=25, required=False,
+                        help='smtp server port')
+    parser.add_argument('--smtp_user', required=False, help='user for smtp authentication')
+    parser.add_argument('--sender', '-e', required=True, help='email address of sender (FROM)')
+    parser.add_argument('--workers', type=int, default=4, required=False,
+                        help='number of sites whose workbooks are fetched concurrently')
+    parser.add_argument('--connections', type=int, default=4, required=False,
+                        help='number of parallel smtp connections')
+    parser.add_argument('--queue_size', type=int, default=100, required=False,
+                        help='items buffered between two pipeline stages')
+    parser.add_argument('--page_size', type=int, default=DEFAULT_PAGE_SIZE, required=False,
+                        help='number of workbooks requested per Metadata API page')
+    parser.add_argument('--max_rows', type=int, default=REPORT_ROWS, required=False,
+                        help='workbooks listed in each report')
+
+    args = parser.parse_args()
+
+    if not args.password:
+        password = getpass.getpass(f'{args.username} Password: ')
+    else:
+        password = args.password
+
+    smtp_password = None
+
+    if args.smtp_user:
+        smtp_password = getpass.getpass(f'{args.smtp_user} Password: ')
+
+    if args.https_cert:
+        verify_ssl = args.https_cert
+    else:
+        verify_ssl = False
+
+    summary = run_subscription_pipeline(
+        args.server, args.version, args.username, password, verify_ssl,
+        load_recipients(args.recipients), args.smtp_server, args.smtp_port,
+        args.smtp_user, smtp_password, args.sender, args.workers,
+        args.connections, args.queue_size, args.page_size, args.max_rows)
+
+    for name, error in summary.pop('failures'):
+        print(f'{name}: {error}', file=sys.stderr)
+
+    print(json.dumps(summary, indent=2))
+
+
+def run_subscription_pipeline(server_url: str, version: str, username: str,
+                              password: str, verify_ssl: str, recipients,
+                              smtp_server: str, smtp_port: int, smtp_user: str,
+                              smtp_password: str, sender: str, workers: int = 4,
+                              connections: int = 4, queue_size: int = 100,
+                              page_size: int = DEFAULT_PAGE_SIZE,
+                              max_rows: int = REPORT_ROWS) -> dict:
+    """Email every subscriber a workbook summary of the site they subscribe to.
+
+    Four stages run at the same time: the sites are listed through the REST
+    API, each subscribed site's workbooks are fetched from the Metadata API,
+    a report is rendered for each of the site's subscribers, and the reports
+    are sent over reused SMTP connections. A site that cannot be fetched and
+    a message that cannot be sent are reported as failures without stopping
+    the others.
+
+    Args:
+        server_url (str): Tableau Server URL.
+        version (str): Tableau Server API version.
+        username (str): Username of Tableau Server user.
+        password (str): Password of Tableau Server user.
+        verify_ssl (str): Path to HTTPS cert. False if HTTP Request will be sent.
+        recipients (iterable): Recipient fields, including email and the url
+            namespace of their site as site.
+        smtp_server (str): SMTP server.
+        smtp_port (int): SMTP server port.
+        smtp_user (str): User for SMTP authentication, or None.
+        smtp_password (str): Password for SMTP authentication.
+        sender (str): Email address of sender (FROM).
+        workers (int): Number of sites whose workbooks are fetched at the same
+            time.
+        connections (int): Number of parallel SMTP connections.
+        queue_size (int): Items buffered between two stages.
+        page_size (int): Number of workbooks requested per Metadata API page.
+        max_rows (int): Workbooks listed in each report.
+
+    Returns:
+        dict: Number of sites and messages, per-stage stats, the bottleneck
+            stage and a list of (site name or recipient email, error) failures.
+
+    """
+    subscribers = subscribers_by_site(recipients)
+    metadata_query = build_workbooks_query(REPORT_FIELDS)
+    failures = []
+    sent = [0]
+    sent_lock = threading.Lock()
+    send_connections = []
+    send_connections_lock = threading.Lock()
+    local = threading.local()
+
+    def list_sites():
+        with TableauRestClient(f'{server_url}/api/{version}', verify_ssl,
+                               pool_size=1) as client:
+            client.sign_in('CLASSIC', username, password, '')
+            yield from iter_subscribed_sites(client.iter_sites(), subscribers,
+                                             failures)
+
+    def fetch_workbooks(site):
+        server = TSC.Server(server_url)
+        server.add_http_options({'verify': verify_ssl})
+        server.version = version
+        tableau_auth = TSC.TableauAuth(username, password, site.url_namespace)
+
+        try:
+            with signed_in(server, tableau_auth):
+                workbooks = aggregate_workbooks(iter_workbook_nodes(
+                    server, tableau_auth, page_size, metadata_query=metadata_query))
+        except Exception as e:
+            failures.append((site.name, str(e)))
+            return ()
+
+        return [(site, workbooks)]
+
+    def render_reports(report):
+        site, workbooks = report
+        template = build_site_report(site, workbooks, max_rows)
+
+        for recipient in subscribers[site.url_namespace]:
+            yield recipient['email'], template.render(sender, recipient)
+
+    def send_report(message):
+        if not hasattr(local, 'smtp'):
+            local.smtp = SMTPConnection(smtp_server, smtp_port, smtp_user,
+                                        smtp_password)
+            with send_connections_lock:
+                send_connections.append(local.smtp)
+
+        recipient, message_bytes = message
+
+        try:
+            local.smtp.sendmail(sender, recipient, message_bytes)
+        except (smtplib.SMTPException, OSError) as e:
+            failures.append((recipient, str(e)))
+            return ()
+
+        with sent_lock:
+            sent[0] += 1
+
+        return ()
+
+    pipeline = Pipeline(queue_size)
+    pipeline.add_stage('sites', list_sites)
+    pipeline.add_stage('workbooks', fetch_workbooks, workers)
+    pipeline.add_stage('render', render_reports)
+    pipeline.add_stage('send', send_report, connections)
+
+    try:
+        summary = pipeline.run()
+    finally:
+        for smtp in send_connections:
+            smtp.close()
+
+    return {
+        'sites': pipeline.stats[0].outputs,
+        'messages': sent[0],
+        **summary,
+        'failures': failures,
+    }
+
+
+def subscribers_by_site(recipients) -> dict:
+    """Group recipients by the url namespace of the site they subscribe to.
+
+    Recipients without a site subscribe to the Default site.
+
+    Args:
+        recipients (iterable): Recipient fields, including email and site.
+
+    Returns:
+        dict: Lists of recipients keyed by site url namespace.
+
+    """
+    subscribers = {}
+
+    for recipient in recipients:
+        subscribers.setdefault(recipient.get('site') or '', []).append(recipient)
+
+    return subscribers
+
+
+def iter_subscribed_sites(sites, subscribers: dict, failures: list = None):
+    """Filter a stream of sites down to the active sites with subscribers.
+
+    Listing stops as soon as every subscribed site has been seen. Subscribed
+    sites that are not active, and subscribed url namespaces missing from
+    the listing, are appended to failures with their subscriber count.
+
+    Args:
+        sites (iterable): Site records, e.g. from iter_sites.
+        subscribers (dict): Recipients keyed by site url namespace.
+        failures (list): Optional list (site, error) failures are appended to.
+
+    Yields:
+        Site: Record of each subscribed site.
+
+    """
+    if failures is None:
+        failures = []
+
+    remaining = set(subscribers)
+
+    for site in sites:
+        if site.url_namespace not in remaining:
+            continue
+
+        remaining.discard(site.url_namespace)
+
+        if site.state == 'Active':
+            yield site
+        else:
+            failures.append((site.name, f'Site is {site.state}, '
+                             f'{len(subscribers[site.url_namespace])} subscribers skipped'))
+
+        if not remaining:
+            return
+
+    for url_namespace in sorted(remaining):
+        failures.append((url_namespace or 'Default', 'Site not found, '
+                         f'{len(subscribers[url_namespace])} subscribers skipped'))
+
+
+def build_site_report(site: object, workbooks: dict,
+                      max_rows: int = REPORT_ROWS) -> MessageTemplate:
+    """Build the report email of a site in the layout of HTML_BODY.
+
+    The hero text of HTML_BODY is replaced with the site name, its workbook,
+    sheet and dashboard totals and a table of its first max_rows workbooks.
+    The returned template is encoded once per site and rendered for each of
+    its subscribers, filling in their ${email}.
+
+    Args:
+        site (object): Site record.
+        workbooks (dict): Aggregated workbooks of the site, with Worksheet
+            Count and Dashboard Count, e.g. from aggregate_workbooks.
+        max_rows (int): Workbooks listed in the report.
+
+    Returns:
+        MessageTemplate: Report email of the site.
+
+    """
+    sheets, dashboards, rows = 0, 0, []
+
+    for workbook in workbooks.values():
+        sheets += workbook.get('Worksheet Count', 0)
+        dashboards += workbook.get('Dashboard Count', 0)
+
+        if len(rows) < max_rows:
+            rows.append(REPORT_ROW.format(
+                name=escape(workbook['Name']),
+                sheets=workbook.get('Worksheet Count', ''),
+                dashboards=workbook.get('Dashboard Count', '')))
+
+    more = ''
+    if len(workbooks) > len(rows):
+        more = f'and {len(workbooks) - len(rows)} more workbooks'
+
+    body = (HTML_BODY
+            .replace('DataDev Day 2021', escape(site.name))
+            .replace('From an API Call to an Enterprise Application',
+                     f'{len(workbooks)} workbooks, {sheets} sheets, '
+                     f'{dashboards} dashboards')
+            .replace('Python sent this email!',
+                     REPORT_TABLE.format(rows=''.join(rows), more=more)))
+
+    return MessageTemplate(body, REPORT_SUBJECT.format(site=site.name))
+
+
+def escape(text: str) -> str:
+    # Also escape $ so names are never read as ${field} template markers.
+    return html.escape(str(text)).replace('$', '&#36;')
+
+
+class StageStats:
+    """Throughput of one pipeline stage.
+
+    Busy time only counts the stage's own work, not time spent waiting for
+    input or blocked on a full output queue, so the stage with the highest
+    utilization is the one holding the pipeline back.
+
+    Args:
+        name (str): Stage name.
+        workers (int): Number of threads running the stage.
+
+    """
+
+    def __init__(self, name: str, workers: int = 1):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.outputs = 0
+        self.busy = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float, items: int = 0, outputs: int = 0):
+        with self.lock:
+            self.busy += seconds
+            self.items += items
+            self.outputs += outputs
+
+    def summary(self, elapsed: float) -> dict:
+        """Summarize the stage's throughput over the pipeline's run time.
+
+        Args:
+            elapsed (float): Seconds the pipeline ran.
+
+        Returns:
+            dict: Items, items per second, busy seconds and utilization of
+                the stage's workers.
+
+        """
+        return {
+            'workers': self.workers,
+            'items': self.items,
+            'outputs': self.outputs,
+            'items_per_second': self.items / elapsed if elapsed else None,
+            'busy_seconds': self.busy,
+            'utilization': self.busy / (elapsed * self.workers) if elapsed else None,
+        }
+
+
+class Pipeline:
+    """Stages running on their own threads, connected by bounded queues.
+
+    Every item a stage produces is handed to the next stage as soon as it is
+    ready, so all stages work at the same time. A full queue blocks the stage
+    feeding it, so a slow stage applies backpressure to the ones before it
+    instead of letting them buffer the whole inventory. An unexpected error
+    in any stage stops the pipeline and is raised by run.
+
+    Args:
+        queue_size (int): Items buffered between two stages.
+
+    """
+
+    def __init__(self, queue_size: int = 100):
+        if queue_size < 1:
+            raise ValueError(f'Queue size must be at least 1, got {queue_size}')
+
+        self.queue_size = queue_size
+        self.stats = []
+        self.work = []
+        self.stopped = threading.Event()
+        self.errors = []
+
+    def add_stage(self, name: str, work, workers: int = 1):
+        """Append a stage to the pipeline.
+
+        The first stage's work is called once without arguments and runs on a
+        single thread. Every later stage's work is called with each item of
+        the previous stage. Both return an iterable, e.g. a list or
+        generator, of the items passed on to the next stage.
+
+        Args:
+            name (str): Stage name used in the summary.
+            work (callable): Produces the stage's items.
+            workers (int): Number of threads running the stage.
+
+        """
+        if workers < 1:
+            raise ValueError(f'Workers must be at least 1, got {workers}')
+
+        if not self.stats and workers != 1:
+            raise ValueError(f'The first stage runs on one worker, got {workers}')
+
+        self.stats.append(StageStats(name, workers))
+        self.work.append(work)
+
+    def run(self) -> dict:
+        """Run every stage until the first stage's items are all processed.
+
+        Returns:
+            dict: Seconds run, per-stage stats and the bottleneck stage, the
+                one with the highest utilization.
+
+        """
+        queues = [None]
+        queues += [queue.Queue(maxsize=self.queue_size) for _ in self.stats[1:]]
+        queues.append(None)
+        threads = []
+
+        for index, (stats, work) in enumerate(zip(self.stats, self.work)):
+            consumers = self.stats[index + 1].workers if index + 1 < len(self.stats) else 0
+            finished = self.finisher(stats.workers, queues[index + 1], consumers)
+
+            for _ in range(stats.workers):
+                threads.append(threading.Thread(
+                    target=self.run_worker,
+                    args=(stats, work, queues[index], queues[index + 1], finished),
+                    daemon=True))
+
+        start = time.perf_counter()
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        elapsed = time.perf_counter() - start
+
+        if self.errors:
+            raise self.errors[0]
+
+        stages = {stats.name: stats.summary(elapsed) for stats in self.stats}
+
+        return {
+            'seconds': elapsed,
+            'stages': stages,
+            'bottleneck': max(stages, key=lambda name: stages[name]['utilization'] or 0),
+        }
+
+    def run_worker(self, stats: StageStats, work, inbox: queue.Queue,
+                   outbox: queue.Queue, finished):
+        try:
+            if inbox is None:
+                self.hand_over(stats, iter(work()), outbox, source=True)
+                return
+
+            while True:
+                item = self.get(inbox)
+
+                if item is None:
+                    return
+
+                start = time.perf_counter()
+                outputs = iter(work(item))
+                stats.record(time.perf_counter() - start, items=1)
+                self.hand_over(stats, outputs, outbox)
+
+        except Exception as e:
+            self.errors.append(e)
+            self.stopped.set()
+
+        finally:
+            finished()
+
+    def hand_over(self, stats: StageStats, outputs, outbox: queue.Queue,
+                  source: bool = False):
+        # Only time spent producing an output counts as busy, not the put.
+        while True:
+            start = time.perf_counter()
+            output = next(outputs, None)
+            stats.record(time.perf_counter() - start,
+                         items=int(source and output is not None),
+                         outputs=int(output is not None))
+
+            if output is None:
+                return
+
+            if outbox is not None and not self.put(outbox, output):
+                return
+
+    def finisher(self, workers: int, outbox: queue.Queue, consumers: int):
+        # The last worker of a stage to finish tells each consumer to stop.
+        remaining = [workers]
+        lock = threading.Lock()
+
+        def finished():
+            with lock:
+                remaining[0] -= 1
+
+                if remaining[0] or outbox is None:
+                    return
+
+            for _ in range(consumers):
+                self.put(outbox, None)
+
+        return finished
+
+    def put(self, outbox: queue.Queue, item) -> bool:
+        while not self.stopped.is_set():
+            try:
+                outbox.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+
+        return False
+
+    def get(self, inbox: queue.Queue):
+        while not self.stopped.is_set():
+            try:
+                return inbox.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+        return None
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_TTL = 3600
+
+
+class TokenCache:
+    """On-disk cache of Tableau Server auth tokens.
+
+    Tokens are keyed by server, site and principal (user or personal access
+    token name) and evicted once they are older than ttl seconds. The cache
+    file is only readable by the current user and is replaced atomically so
+    concurrent runs never see a partial write. Updates are serialized between
+    threads and, where fcntl is available, between processes through a lock
+    file next to the cache, so concurrent sign ins do not drop each other's
+    tokens.
+
+    Args:
+        path (str): Path of the JSON cache file.
+        ttl (float): Seconds a token is reused before it is evicted.
+
+    """
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL):
+        self.path = os.path.expanduser(path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(server: str, site: str, principal: str) -> str:
+        """Hash the server, site and principal into a cache key.
+
+        Args:
+            server (str): Tableau Server URL.
+            site (str): Tableau Server Site name as it appears in the URL.
+            principal (str): Name of the Token or User.
+
+        Returns:
+            str: Cache key.
+
+        """
+        return hashlib.sha256(
+            '\n'.join([server, site, principal]).encode()).hexdigest()
+
+    def get(self, server: str, site: str, principal: str) -> dict:
+        """Look up an unexpired token.
+
+        Args:
+            server (str): Tableau Server URL.
+            site (str): Tableau Server Site name as it appears in the URL.
+            principal (str): Name of the Token or User.
+
+        Returns:
+            dict: Cached token, site_id and user_id, or None if not cached.
+
+        """
+        with self._locked():
+            return self._load().get(self.cache_key(server, site, principal))
+
+    def put(self, server: str, site: str, principal: str, token: str,
+            site_id: str = None, user_id: str = None):
+        """Store a token.
+
+        Args:
+            server (str): Tableau Server URL.
+            site (str): Tableau Server Site name as it appears in the URL.
+            principal (str): Name of the Token or User.
+            token (str): REST API credentials token.
+            site_id (str): Luid of the signed in site.
+            user_id (str): Luid of the signed in user.
+
+        """
+        with self._locked():
+            entries = self._load()
+            entries[self.cache_key(server, site, principal)] = {
+                'token': token,
+                'site_id': site_id,
+                'user_id': user_id,
+                'expires': time.time() + self.ttl,
+            }
+            self._save(entries)
+
+    def remove(self, server: str, site: str, principal: str):
+        """Evict a token, e.g. after the server rejected it.
+
+        Args:
+            server (str): Tableau Server URL.
+            site (str): Tableau Server Site name as it appears in the URL.
+            principal (str): Name of the Token or User.
+
+        """
+        with self._locked():
+            entries = self._load()
+
+            if entries.pop(self.cache_key(server, site, principal), None):
+                self._save(entries)
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+
+            descriptor = os.open(f'{self.path}.lock', os.O_CREAT | os.O_RDWR, 0o600)
+
+            try:
+                fcntl.flock(descriptor, fcntl.LOCK_EX)
+                yield
+            finally:
+                os.close(descriptor)
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path) as cache_file:
+                entries = json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+
+        now = time.time()
+
+        return {key: entry for key, entry in entries.items()
+                if entry.get('expires', 0) > now}
+
+    def _save(self, entries: dict):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temp_path = tempfile.mkstemp(dir=directory,
+                                                 prefix='.token_cache')
+
+        try:
+            with os.fdopen(descriptor, 'w') as cache_file:
+                json.dump(entries, cache_file)
+            os.chmod(temp_path, 0o600)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise